@@ -6,12 +6,18 @@ configure the spotify service with the correct audio_device setting.
 """
 
 import asyncio
+import concurrent.futures
+import contextlib
+import json
+import logging
+import os
 import platform
 import re
-import subprocess
-from collections.abc import Mapping, Sequence
-from typing import Any, ClassVar
+import time
+from collections.abc import Awaitable, Callable, Hashable, Iterator, Mapping, Sequence
+from typing import Any, ClassVar, TypeVar, cast
 
+from google.protobuf.struct_pb2 import Struct
 from typing_extensions import Self
 from viam.logging import getLogger
 from viam.module.types import Reconfigurable
@@ -24,10 +30,90 @@ from viam.services.discovery import Discovery
 
 LOGGER = getLogger("gambit-robotics:service:audio-discovery")
 
+# Parsers for pactl/aplay output (_ALSA_RE is the fallback for odd aplay lines)
+_NAME_SEP_RE = re.compile(r"[^a-z0-9]+")
+_ALSA_RE = re.compile(r"card (\d+): ([\w-]+) \[([^\]]+)\], device (\d+): (.+)")
+_HZ_RE = re.compile(r"(\d+)Hz")
+_CH_RE = re.compile(r"(\d+)ch")
+
+# pactl "Key: value" lines copied verbatim into the sink dict
+_PACTL_FIELDS = {
+    "Name": "name",
+    "Description": "description",
+    "State": "state",
+}
+
 
 def _sanitize_name(s: str) -> str:
     """Convert to valid component name (lowercase, alphanumeric, hyphens)."""
-    return re.sub(r"[^a-z0-9]+", "-", s.lower()).strip("-")
+    return _NAME_SEP_RE.sub("-", s.lower()).strip("-")
+
+
+def _parse_aplay_line(line: str) -> tuple[str, str, str, str] | None:
+    """Split an `aplay -l` card line into (card_num, card_id, card_name, device_num).
+
+    Format: "card 0: PCH [HDA Intel PCH], device 0: ALC269VC Analog [...]".
+    Uses plain string splitting and only falls back to the regex for lines
+    that don't fit the fixed layout.
+    """
+    if not line.startswith("card "):
+        return None
+
+    head, sep, rest = line.partition(", device ")
+    if sep:
+        card_num, _, card = head[5:].partition(": ")
+        card_id, _, card_name = card.partition(" [")
+        device_num, _, desc = rest.partition(": ")
+        if (
+            card_num.isdigit()
+            and device_num.isdigit()
+            and card_id
+            and " " not in card_id
+            and card_name.endswith("]")
+            and desc
+        ):
+            return card_num, card_id, card_name[:-1], device_num
+
+    match = _ALSA_RE.match(line)
+    if match:
+        return match.group(1), match.group(2), match.group(3), match.group(4)
+    return None
+
+
+def _pipewire_running(proc_root: str = "/proc") -> bool:
+    """Check for a running pipewire process by reading /proc/<pid>/comm.
+
+    Equivalent to `pgrep -x pipewire` without forking.
+    """
+    try:
+        entries = os.scandir(proc_root)
+    except OSError:
+        return False
+    with entries:
+        for entry in entries:
+            if not entry.name.isdigit():
+                continue
+            try:
+                with open(os.path.join(entry.path, "comm"), "rb") as f:
+                    if f.read() == b"pipewire\n":
+                        return True
+            except OSError:
+                # Process exited or isn't readable
+                continue
+    return False
+
+
+def _spotify_attributes(backend: str, audio_device: str, device_name: str) -> Struct:
+    """Build spotify service attributes for a discovered device in one pass."""
+    attributes = Struct()
+    attributes.update(
+        {
+            "audio_backend": backend,
+            "audio_device": audio_device,
+            "device_name": device_name,
+        }
+    )
+    return attributes
 
 
 # Backend constants
@@ -35,12 +121,94 @@ BACKEND_PIPEWIRE = "pipewire"
 BACKEND_PULSEAUDIO = "pulseaudio"
 BACKEND_ALSA = "alsa"
 
+# Cache keys and TTLs (seconds) for subprocess-backed probes
+CACHE_KEY_PACTL_SINKS = ("pactl-sinks",)
+CACHE_KEY_APLAY = ("aplay-l",)
+CACHE_KEY_BACKEND = ("backend",)
+SINKS_CACHE_TTL = 5.0
+BACKEND_CACHE_TTL = 30.0
+
+# Hotplug watching
+ALSA_CARDS_PATH = "/proc/asound/cards"
+ALSA_POLL_INTERVAL = 2.0
+
+
+_T = TypeVar("_T")
+
+
+class _SubprocessCache:
+    """TTL cache for parsed subprocess output.
+
+    Device lists are essentially static between hotplug events, so repeated
+    discovery calls can reuse the last parsed result instead of re-forking.
+    """
+
+    def __init__(self) -> None:
+        self._entries: dict[Hashable, tuple[float, Any]] = {}
+        # Bumped by invalidate() so a probe started before it can't store stale output
+        self._generations: dict[Hashable, int] = {}
+        # Probes in flight, shared by concurrent misses on the same key
+        self._pending: dict[Hashable, asyncio.Future] = {}
+
+    async def get(
+        self, key: Hashable, ttl: float, producer: Callable[[], Awaitable[_T]]
+    ) -> tuple[_T, bool]:
+        """Return (value, hit), awaiting producer if the entry is missing or stale."""
+        # Each key is only ever filled by one producer, so its entry has that producer's type
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry[0] < ttl:
+            return cast(_T, entry[1]), True
+
+        probe = self._pending.get(key)
+        if probe is None:
+            # Run the probe as its own task so a cancelled caller doesn't abort it
+            # for everyone else waiting on the same key
+            probe = asyncio.ensure_future(producer())
+            self._pending[key] = probe
+            generation = self._generations.get(key, 0)
+            probe.add_done_callback(lambda done: self._store(key, generation, done))
+        return cast(_T, await asyncio.shield(probe)), False
+
+    def _store(self, key: Hashable, generation: int, probe: asyncio.Future) -> None:
+        if self._pending.get(key) is probe:
+            del self._pending[key]
+        if probe.cancelled() or probe.exception() is not None:
+            return
+        if self._generations.get(key, 0) == generation:
+            self._entries[key] = (time.monotonic(), probe.result())
+
+    def invalidate(self, key: Hashable | None = None) -> None:
+        """Drop one entry, or all entries if no key is given."""
+        keys = list(self._entries.keys() | self._pending.keys()) if key is None else [key]
+        for k in keys:
+            self._entries.pop(k, None)
+            self._generations[k] = self._generations.get(k, 0) + 1
+            # Later callers shouldn't join a probe that started before the change
+            self._pending.pop(k, None)
+
+
+_SUBPROCESS_CACHE = _SubprocessCache()
+
 
 class AudioDiscovery(Discovery, Reconfigurable):
     """Discovers audio output devices available on the system."""
 
     MODEL: ClassVar[Model] = Model(ModelFamily("gambit-robotics", "service"), "audio-discovery")
 
+    _cache_hits: int = 0
+    _cache_misses: int = 0
+    _pactl_json_supported: bool | None = None
+    _watch_task: asyncio.Task | None = None
+    _executor: concurrent.futures.ThreadPoolExecutor | None = None
+
+    def __init__(self, name: str, *, logger: logging.Logger | None = None) -> None:
+        super().__init__(name, logger=logger)
+        # The platform can't change at runtime, so pick the implementation once
+        if platform.system() == "Linux":
+            self._discover = self._discover_linux
+        else:
+            self._discover = self._discover_unsupported
+
     @classmethod
     def new(
         cls,
@@ -60,41 +228,187 @@ class AudioDiscovery(Discovery, Reconfigurable):
         config: ComponentConfig,
         dependencies: Mapping[ResourceName, ResourceBase],
     ) -> None:
-        pass
+        if self._executor is None:
+            # Only the /proc scan blocks; subprocess probes run on the event loop
+            self._executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="audio-disc"
+            )
+        self._start_watcher()
 
     async def close(self) -> None:
-        pass
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._watch_task
+            self._watch_task = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _start_watcher(self) -> None:
+        """Start the hotplug watcher if an event loop is available."""
+        if self._watch_task is not None and not self._watch_task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No loop (e.g. constructed outside the module runtime) - rely on TTLs
+            return
+        self._watch_task = loop.create_task(self._watch_device_events())
+
+    def _read_alsa_cards(self) -> bytes | None:
+        # procfs timestamps never change, so compare contents - it's one small read
+        try:
+            with open(ALSA_CARDS_PATH, "rb") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    async def _watch_device_events(self) -> None:
+        """Invalidate cached device lists when sinks or sound cards change.
+
+        Follows `pactl subscribe` for sink events and re-reads
+        /proc/asound/cards between reads as a cheap ALSA fallback.
+        """
+        proc: asyncio.subprocess.Process | None = None
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                "pactl",
+                "subscribe",
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+        except OSError as e:
+            LOGGER.debug(f"pactl subscribe unavailable: {e}")
 
-    def _run_command(self, cmd: list[str], timeout: int = 5) -> str | None:
+        alsa_cards = self._read_alsa_cards()
+        try:
+            while True:
+                if proc is not None and proc.stdout is not None:
+                    try:
+                        line = await asyncio.wait_for(proc.stdout.readline(), ALSA_POLL_INTERVAL)
+                    except asyncio.TimeoutError:
+                        line = None
+                    if line == b"":
+                        LOGGER.debug("pactl subscribe exited")
+                        proc = None
+                    elif line and b" on sink #" in line:
+                        _SUBPROCESS_CACHE.invalidate(CACHE_KEY_PACTL_SINKS)
+                else:
+                    await asyncio.sleep(ALSA_POLL_INTERVAL)
+
+                cards = self._read_alsa_cards()
+                if cards != alsa_cards:
+                    alsa_cards = cards
+                    _SUBPROCESS_CACHE.invalidate(CACHE_KEY_APLAY)
+        finally:
+            if proc is not None and proc.returncode is None:
+                proc.kill()
+
+    async def _run_command(self, cmd: list[str], timeout: int = 5) -> str | None:
         """Run a shell command and return output."""
         try:
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=timeout,
+            proc = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
             )
-            if result.returncode == 0:
-                return result.stdout
-            LOGGER.warning(f"Command '{cmd[0]}' exited with code {result.returncode}")
-            return None
         except FileNotFoundError:
             LOGGER.warning(f"Command '{cmd[0]}' not found - is it installed?")
             return None
-        except subprocess.TimeoutExpired:
-            LOGGER.warning(f"Command '{cmd[0]}' timed out after {timeout}s")
-            return None
         except Exception as e:
             LOGGER.warning(f"Command '{cmd[0]}' failed: {e}")
             return None
 
-    def _discover_pulseaudio_sinks(self) -> list[dict]:
+        try:
+            stdout, _ = await asyncio.wait_for(proc.communicate(), timeout)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            LOGGER.warning(f"Command '{cmd[0]}' timed out after {timeout}s")
+            return None
+
+        if proc.returncode == 0:
+            return stdout.decode(errors="replace")
+        LOGGER.warning(f"Command '{cmd[0]}' exited with code {proc.returncode}")
+        return None
+
+    async def _cached(self, key: Hashable, ttl: float, producer: Callable[[], Awaitable[_T]]) -> _T:
+        """Look up a probe result in the shared cache, tracking hits/misses."""
+        value, hit = await _SUBPROCESS_CACHE.get(key, ttl, producer)
+        if hit:
+            self._cache_hits += 1
+        else:
+            self._cache_misses += 1
+        return value
+
+    def invalidate_cache(self) -> None:
+        """Force the next discovery call to re-run all probes."""
+        _SUBPROCESS_CACHE.invalidate()
+
+    async def _discover_pulseaudio_sinks(self) -> list[dict]:
         """Discover PulseAudio/PipeWire sinks using pactl."""
-        devices = []
-        output = self._run_command(["pactl", "list", "sinks"])
+        return await self._cached(
+            CACHE_KEY_PACTL_SINKS, SINKS_CACHE_TTL, self._probe_pulseaudio_sinks
+        )
+
+    async def _probe_pulseaudio_sinks(self) -> list[dict]:
+        """Run pactl and parse its sink list.
+
+        Prefers `pactl --format=json` (PulseAudio 16+ / pipewire-pulse) and
+        falls back to scraping the text output on older versions.
+        """
+        if self._pactl_json_supported is not False:
+            output = await self._run_command(["pactl", "--format=json", "list", "sinks"])
+            sinks = self._parse_pactl_json(output) if output else None
+            if sinks is not None:
+                self._pactl_json_supported = True
+                return sinks
+
+        output = await self._run_command(["pactl", "list", "sinks"])
         if not output:
-            return devices
+            return []
+        if self._pactl_json_supported is None:
+            # Text works but JSON didn't - don't try JSON again
+            self._pactl_json_supported = False
+        return self._parse_pactl_text(output)
+
+    def _parse_pactl_json(self, output: str) -> list[dict] | None:
+        """Parse `pactl --format=json list sinks` output, or None if it isn't JSON."""
+        try:
+            data = json.loads(output)
+        except ValueError:
+            return None
+        if not isinstance(data, list):
+            return None
 
+        devices = []
+        for sink in data:
+            device: dict = {"backend": BACKEND_PULSEAUDIO}
+            for key in ("name", "description", "state"):
+                if key in sink:
+                    device[key] = sink[key]
+            if "description" not in device:
+                desc = sink.get("properties", {}).get("device.description")
+                if desc:
+                    device["description"] = desc
+
+            # pactl reports the sample spec as a string, e.g. "s16le 2ch 44100Hz"
+            spec = sink.get("sample_specification", "")
+            match = _HZ_RE.search(spec)
+            if match:
+                device["sample_rate"] = int(match.group(1))
+            match = _CH_RE.search(spec)
+            if match:
+                device["channels"] = int(match.group(1))
+
+            devices.append(device)
+
+        return devices
+
+    def _parse_pactl_text(self, output: str) -> list[dict]:
+        """Parse human-readable `pactl list sinks` output."""
+        devices = []
         current_sink: dict = {}
         for line in output.split("\n"):
             line = line.strip()
@@ -103,22 +417,21 @@ class AudioDiscovery(Discovery, Reconfigurable):
                 if current_sink:
                     devices.append(current_sink)
                 current_sink = {"backend": BACKEND_PULSEAUDIO}
+                continue
 
-            elif line.startswith("Name:"):
-                current_sink["name"] = line.split(":", 1)[1].strip()
+            key, sep, value = line.partition(":")
+            if not sep:
+                continue
 
-            elif line.startswith("Description:"):
-                current_sink["description"] = line.split(":", 1)[1].strip()
+            field = _PACTL_FIELDS.get(key)
+            if field is not None:
+                current_sink[field] = value.strip()
 
-            elif line.startswith("State:"):
-                current_sink["state"] = line.split(":", 1)[1].strip()
-
-            elif "Sample Specification:" in line:
-                spec = line.split(":", 1)[1].strip()
-                match = re.search(r"(\d+)Hz", spec)
+            elif key == "Sample Specification":
+                match = _HZ_RE.search(value)
                 if match:
                     current_sink["sample_rate"] = int(match.group(1))
-                match = re.search(r"(\d+)ch", spec)
+                match = _CH_RE.search(value)
                 if match:
                     current_sink["channels"] = int(match.group(1))
 
@@ -127,20 +440,21 @@ class AudioDiscovery(Discovery, Reconfigurable):
 
         return devices
 
-    def _discover_alsa_devices(self) -> list[dict]:
+    async def _discover_alsa_devices(self) -> list[dict]:
         """Discover ALSA devices using aplay."""
+        return await self._cached(CACHE_KEY_APLAY, SINKS_CACHE_TTL, self._probe_alsa_devices)
+
+    async def _probe_alsa_devices(self) -> list[dict]:
+        """Run aplay and parse its device list."""
         devices = []
-        output = self._run_command(["aplay", "-l"])
+        output = await self._run_command(["aplay", "-l"])
         if not output:
             return devices
 
         for line in output.split("\n"):
-            match = re.match(r"card (\d+): ([\w-]+) \[([^\]]+)\], device (\d+): (.+)", line)
-            if match:
-                card_num = match.group(1)
-                card_id = match.group(2)
-                card_name = match.group(3)
-                device_num = match.group(4)
+            parsed = _parse_aplay_line(line)
+            if parsed:
+                card_num, card_id, card_name, device_num = parsed
 
                 devices.append(
                     {
@@ -155,11 +469,16 @@ class AudioDiscovery(Discovery, Reconfigurable):
 
         return devices
 
-    def _check_audio_backend(self) -> str:
+    async def _check_audio_backend(self) -> str:
         """Determine which audio backend is available."""
-        if self._run_command(["pgrep", "-x", "pipewire"]):
+        return await self._cached(CACHE_KEY_BACKEND, BACKEND_CACHE_TTL, self._probe_audio_backend)
+
+    async def _probe_audio_backend(self) -> str:
+        """Probe for a running sound server."""
+        loop = asyncio.get_running_loop()
+        if await loop.run_in_executor(self._executor, _pipewire_running):
             return BACKEND_PIPEWIRE
-        if self._run_command(["pactl", "info"]):
+        if await self._run_command(["pactl", "info"]):
             return BACKEND_PULSEAUDIO
         return BACKEND_ALSA
 
@@ -170,20 +489,16 @@ class AudioDiscovery(Discovery, Reconfigurable):
         timeout: float | None = None,
     ) -> list[ComponentConfig]:
         """Discover available audio output devices."""
-        if platform.system() != "Linux":
-            LOGGER.warning("Audio discovery only supported on Linux")
-            return []
+        return await self._discover()
 
-        loop = asyncio.get_running_loop()
+    async def _discover_unsupported(self) -> list[ComponentConfig]:
+        LOGGER.warning("Audio discovery only supported on Linux")
+        return []
 
-        # Run all discovery in parallel
-        backend, pulse_devices, alsa_devices = await asyncio.gather(
-            loop.run_in_executor(None, self._check_audio_backend),
-            loop.run_in_executor(None, self._discover_pulseaudio_sinks),
-            loop.run_in_executor(None, self._discover_alsa_devices),
-        )
-
-        configs = []
+    def _build_configs(
+        self, pulse_devices: list[dict], alsa_devices: list[dict]
+    ) -> Iterator[ComponentConfig]:
+        """Yield a suggested spotify config per device, PulseAudio sinks first."""
         used_names: set[str] = set()
 
         def get_unique_name(base_name: str) -> str:
@@ -196,40 +511,36 @@ class AudioDiscovery(Discovery, Reconfigurable):
             used_names.add(name)
             return name
 
-        # Add PulseAudio/PipeWire sinks
-        for i, device in enumerate(pulse_devices):
-            desc = device.get("description", f"speaker-{i}")
-            config = ComponentConfig(
-                name=get_unique_name(_sanitize_name(desc)),
-                api="rdk:service:generic",
-                model="gambit-robotics:service:spotify",
-            )
-            config.attributes.fields["audio_backend"].string_value = BACKEND_PULSEAUDIO
-            config.attributes.fields["audio_device"].string_value = device.get("name", "default")
-            config.attributes.fields["device_name"].string_value = device.get(
-                "description", "Speaker"
-            )
-            configs.append(config)
-
-        # Add ALSA devices
-        for i, device in enumerate(alsa_devices):
-            desc = device.get("description", f"speaker-{i}")
-            config = ComponentConfig(
-                name=get_unique_name(_sanitize_name(desc)),
-                api="rdk:service:generic",
-                model="gambit-robotics:service:spotify",
-            )
-            config.attributes.fields["audio_backend"].string_value = BACKEND_ALSA
-            config.attributes.fields["audio_device"].string_value = device.get("name", "default")
-            config.attributes.fields["device_name"].string_value = device.get(
-                "description", "Speaker"
-            )
-            configs.append(config)
+        for backend, devices in (
+            (BACKEND_PULSEAUDIO, pulse_devices),
+            (BACKEND_ALSA, alsa_devices),
+        ):
+            for i, device in enumerate(devices):
+                desc = device.get("description")
+                yield ComponentConfig(
+                    name=get_unique_name(_sanitize_name(desc or f"speaker-{i}")),
+                    api="rdk:service:generic",
+                    model="gambit-robotics:service:spotify",
+                    attributes=_spotify_attributes(
+                        backend, device.get("name") or "default", desc or "Speaker"
+                    ),
+                )
+
+    async def _discover_linux(self) -> list[ComponentConfig]:
+        # Run all discovery in parallel
+        backend, pulse_devices, alsa_devices = await asyncio.gather(
+            self._check_audio_backend(),
+            self._discover_pulseaudio_sinks(),
+            self._discover_alsa_devices(),
+        )
+
+        configs = list(self._build_configs(pulse_devices, alsa_devices))
 
         LOGGER.info(
             f"Discovered {len(pulse_devices)} PulseAudio/PipeWire sinks, "
             f"{len(alsa_devices)} ALSA devices (backend: {backend})"
         )
+        LOGGER.debug(f"Discovery cache: {self._cache_hits} hits, {self._cache_misses} misses")
 
         return configs
 
@@ -242,20 +553,23 @@ class AudioDiscovery(Discovery, Reconfigurable):
     ) -> Mapping[str, Any]:
         """Handle custom commands."""
         cmd = command.get("command", "")
-        loop = asyncio.get_running_loop()
 
         if cmd == "get_backend":
-            backend = await loop.run_in_executor(None, self._check_audio_backend)
+            backend = await self._check_audio_backend()
             return {"backend": backend}
 
         if cmd == "list_sinks":
-            sinks = await loop.run_in_executor(None, self._discover_pulseaudio_sinks)
+            sinks = await self._discover_pulseaudio_sinks()
             return {"sinks": sinks}
 
         if cmd == "list_alsa":
-            devices = await loop.run_in_executor(None, self._discover_alsa_devices)
+            devices = await self._discover_alsa_devices()
             return {"devices": devices}
 
+        if cmd == "refresh":
+            self.invalidate_cache()
+            return {"success": True}
+
         return {"error": f"Unknown command: {cmd}"}
 
 
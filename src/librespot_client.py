@@ -1,20 +1,97 @@
 """
 HTTP client for go-librespot API.
 
-Provides methods for playback control and status queries.
+Provides methods for playback control and status queries. Player status is
+cached and kept current from go-librespot's event WebSocket when connected.
 """
 
 import json
-from dataclasses import dataclass, field
+import random
+import re
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
 from typing import Any
 
 import requests
+import websocket
+from requests.adapters import HTTPAdapter
 from viam.logging import getLogger
 
-LOGGER = getLogger("gambit-robotics:service:spotify")
+_loads: Callable[[bytes | str], Any]
+try:
+    import orjson
+
+    _loads = orjson.loads
+except ImportError:  # orjson is an optional speedup
+    _loads = json.loads
 
+LOGGER = getLogger("gambit-robotics:service:spotify")
 
-@dataclass
+# go-librespot release dates look like "year:2010 month:4 day:12"
+_DATE_RE = re.compile(r"year:(\d+)(?:\s+month:(\d+))?(?:\s+day:(\d+))?")
+
+# TrackMetadata fields that describe the player rather than the track
+_PLAYER_STATE_ATTRS = ("is_playing", "volume", "shuffle", "repeat_context", "repeat_track")
+
+# Repeat mode -> (repeat_context, repeat_track)
+_REPEAT_MODES = {
+    "off": (False, False),
+    "context": (True, False),
+    "track": (False, True),
+}
+
+# (attribute, go-librespot key, default) tables for status parsing
+_STATUS_FIELDS = (
+    ("device_id", "device_id", ""),
+    ("device_name", "device_name", ""),
+    ("username", "username", ""),
+    ("device_type", "device_type", ""),
+    ("play_origin", "play_origin", ""),
+    ("buffering", "buffering", False),
+    ("volume_steps", "volume_steps", 64),
+)
+_TRACK_FIELDS = (
+    ("uri", "uri", ""),
+    ("name", "name", ""),
+    ("album", "album_name", ""),
+    ("artwork_url", "album_cover_url", ""),
+    ("duration_ms", "duration", 0),
+    # Position is inside track object
+    ("progress_ms", "position", 0),
+    ("track_number", "track_number", 0),
+    ("disc_number", "disc_number", 0),
+)
+# Player state lives at the top level of /status but on TrackMetadata here
+_PLAYER_FIELDS = (
+    ("volume", "volume", 50),
+    ("shuffle", "shuffle_context", False),
+    ("repeat_context", "repeat_context", False),
+    ("repeat_track", "repeat_track", False),
+)
+
+# Event type -> (TrackMetadata attribute, event data key, converter) for
+# events that change a single value
+_VALUE_EVENTS = {
+    "seek": ("progress_ms", "position", int),
+    "volume": ("volume", "value", int),
+    "shuffle_context": ("shuffle", "value", bool),
+    "repeat_context": ("repeat_context", "value", bool),
+    "repeat_track": ("repeat_track", "value", bool),
+}
+# Event type -> (PlayerStatus changes, TrackMetadata changes) for playback state events
+_STATE_EVENTS: dict[str, tuple[dict[str, Any], dict[str, Any]]] = {
+    "playing": ({"active": True, "buffering": False}, {"is_playing": True}),
+    "paused": ({"active": True}, {"is_playing": False}),
+    "not_playing": ({}, {"is_playing": False}),
+    "stopped": ({"active": False}, {"is_playing": False}),
+}
+
+
+@dataclass(slots=True)
 class TrackMetadata:
     """Current track metadata from go-librespot."""
 
@@ -35,7 +112,7 @@ class TrackMetadata:
     disc_number: int = 0
 
 
-@dataclass
+@dataclass(slots=True)
 class PlayerStatus:
     """Full player status."""
 
@@ -60,6 +137,39 @@ class LibrespotClient:
     ):
         self.api_url = api_url.rstrip("/")
         self.timeout = timeout
+        # Full URL per endpoint, built on first use
+        self._urls: dict[str, str] = {}
+
+        # Keep-alive session so control calls reuse one loopback connection
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=8, max_retries=0)
+        self._session.mount("http://", adapter)
+        # For issuing independent requests concurrently (e.g. both repeat flags)
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="librespot-io")
+
+        # Formatted (artist, release_date) for the last few track URIs
+        self._track_cache: OrderedDict[str, tuple[str, str]] = OrderedDict()
+        self._track_cache_lock = threading.Lock()
+        self._track_cache_max_size = 4
+
+        # Event-driven status cache
+        # (status, monotonic time its progress_ms was current). Snapshots are never
+        # mutated - writers bind a new tuple - so readers don't need the lock.
+        self._status_lock = threading.Lock()
+        self._status_snapshot: tuple[PlayerStatus, float] | None = None
+        self._status_generation = 0  # bumped per event so in-flight fetches can't clobber it
+        self._ws: websocket.WebSocketApp | None = None
+        self._ws_thread: threading.Thread | None = None
+        self._ws_stop = threading.Event()
+        self._ws_connected = False
+        self._reconnect_attempt = 0
+        self._max_reconnect_delay = 16.0
+
+    @property
+    def ws_url(self) -> str:
+        if self.api_url.startswith("http"):
+            return "ws" + self.api_url[4:] + "/events"
+        return self.api_url + "/events"
 
     def _request(
         self,
@@ -69,9 +179,11 @@ class LibrespotClient:
         params: dict | None = None,
     ) -> dict | None:
         """Make an HTTP request to go-librespot API."""
-        url = f"{self.api_url}{endpoint}"
+        url = self._urls.get(endpoint)
+        if url is None:
+            url = self._urls[endpoint] = f"{self.api_url}{endpoint}"
         try:
-            response = requests.request(
+            response = self._session.request(
                 method=method,
                 url=url,
                 json=json_data,
@@ -79,8 +191,10 @@ class LibrespotClient:
                 timeout=self.timeout,
             )
             response.raise_for_status()
-            if response.text:
-                return response.json()
+            # Parse the raw bytes directly; orjson skips the str decode pass
+            content = response.content
+            if content:
+                return _loads(content)
             return {}
         except requests.exceptions.ConnectionError:
             LOGGER.debug(f"Connection error to go-librespot at {url}")
@@ -91,7 +205,7 @@ class LibrespotClient:
         except requests.exceptions.HTTPError as e:
             LOGGER.warning(f"HTTP error from go-librespot: {e}")
             return None
-        except json.JSONDecodeError:
+        except ValueError:  # JSONDecodeError or invalid UTF-8
             LOGGER.warning(f"Invalid JSON from go-librespot: {url}")
             return None
 
@@ -110,44 +224,188 @@ class LibrespotClient:
 
     def _parse_status(self, data: dict) -> PlayerStatus:
         """Parse status response into PlayerStatus object."""
-        status = PlayerStatus()
-
-        # Device/session info
-        status.active = data.get("stopped", True) is False
-        status.device_id = data.get("device_id", "")
-        status.device_name = data.get("device_name", "")
-        status.username = data.get("username", "")
-        status.device_type = data.get("device_type", "")
-        status.play_origin = data.get("play_origin", "")
-        status.buffering = data.get("buffering", False)
-        status.volume_steps = data.get("volume_steps", 64)
-
         # Parse track metadata (go-librespot field names)
-        track = data.get("track", {})
-        if track:
-            status.track = TrackMetadata(
-                uri=track.get("uri", ""),
-                name=track.get("name", ""),
-                artist=self._format_artists(track.get("artist_names", [])),
-                album=track.get("album_name", ""),
-                artwork_url=track.get("album_cover_url", ""),
-                duration_ms=track.get("duration", 0),
-                release_date=self._parse_release_date(track.get("release_date", "")),
-                track_number=track.get("track_number", 0),
-                disc_number=track.get("disc_number", 0),
-            )
-            # Position is inside track object
-            status.track.progress_ms = track.get("position", 0)
+        track = data.get("track")
+        track_kwargs = self._track_kwargs(track) if track else {}
 
         # Player state (from top-level response)
-        status.track.is_playing = data.get("paused", True) is False
-        status.track.volume = data.get("volume", 50)
-        status.track.shuffle = data.get("shuffle_context", False)
-        status.track.repeat_context = data.get("repeat_context", False)
-        status.track.repeat_track = data.get("repeat_track", False)
+        for attr, key, default in _PLAYER_FIELDS:
+            track_kwargs[attr] = data.get(key, default)
+        track_kwargs["is_playing"] = not data.get("paused", True)
+
+        return PlayerStatus(
+            active=not data.get("stopped", True),
+            track=TrackMetadata(**track_kwargs),
+            **{attr: data.get(key, default) for attr, key, default in _STATUS_FIELDS},
+        )
+
+    def _track_kwargs(self, track: dict) -> dict[str, Any]:
+        """Map a go-librespot track object to TrackMetadata keyword arguments."""
+        kwargs = {attr: track.get(key, default) for attr, key, default in _TRACK_FIELDS}
+        kwargs["artist"], kwargs["release_date"] = self._format_track_text(track, kwargs["uri"])
+        return kwargs
+
+    def _format_track_text(self, track: dict, uri: str) -> tuple[str, str]:
+        """Format artists and release date, reusing results for recently seen URIs."""
+        if uri:
+            with self._track_cache_lock:
+                cached = self._track_cache.get(uri)
+                if cached is not None:
+                    self._track_cache.move_to_end(uri)
+                    return cached
+
+        result = (
+            self._format_artists(track.get("artist_names", [])),
+            self._parse_release_date(track.get("release_date", "")),
+        )
+
+        if uri:
+            with self._track_cache_lock:
+                self._track_cache[uri] = result
+                while len(self._track_cache) > self._track_cache_max_size:
+                    self._track_cache.popitem(last=False)
+        return result
+
+    def _parse_track(self, track: dict) -> TrackMetadata:
+        """Parse a go-librespot track object (from /status or a metadata event)."""
+        return TrackMetadata(**self._track_kwargs(track))
+
+    def get_cached_status(self) -> PlayerStatus | None:
+        """Get player status, served from the event-driven cache when possible.
+
+        While the event WebSocket is connected, the cache is kept current from
+        events and reads need no HTTP traffic. Otherwise this behaves like
+        get_status().
+        """
+        snapshot = self._status_snapshot
+        if self._ws_connected and snapshot is not None:
+            return self._extrapolate(snapshot, time.monotonic())
+        generation = self._status_generation
 
+        status = self.get_status()
+        if status is None:
+            return None
+
+        with self._status_lock:
+            if self._ws_connected and generation == self._status_generation:
+                self._status_snapshot = (status, time.monotonic())
         return status
 
+    def _extrapolate(self, snapshot: tuple[PlayerStatus, float], now: float) -> PlayerStatus:
+        """Return the snapshot's status with progress moved forward by time played."""
+        status, since = snapshot
+        if not status.track.is_playing:
+            return status
+        progress = status.track.progress_ms + int((now - since) * 1000)
+        if status.track.duration_ms:
+            progress = min(progress, status.track.duration_ms)
+        return replace(status, track=replace(status.track, progress_ms=progress))
+
+    def _apply_event(
+        self, snapshot: tuple[PlayerStatus, float], event_type: str, data: dict
+    ) -> tuple[PlayerStatus, float] | None:
+        """Build the snapshot that follows a WebSocket event, or None if unhandled."""
+        now = time.monotonic()
+        current = self._extrapolate(snapshot, now)
+
+        if event_type == "metadata":
+            # Build the new track in one go; player state isn't part of
+            # track metadata, so carry it over from the current track
+            kwargs = self._track_kwargs(data)
+            for attr in _PLAYER_STATE_ATTRS:
+                kwargs[attr] = getattr(current.track, attr)
+            return replace(current, track=TrackMetadata(**kwargs)), now
+
+        value_event = _VALUE_EVENTS.get(event_type)
+        if value_event is not None:
+            attr, key, convert = value_event
+            if key not in data:
+                return current, now
+            track = replace(current.track, **{attr: convert(data[key])})
+            return replace(current, track=track), now
+
+        state_event = _STATE_EVENTS.get(event_type)
+        if state_event is None:
+            return None
+        status_changes, track_changes = state_event
+        track = replace(current.track, **track_changes)
+        return replace(current, track=track, **status_changes), now
+
+    def start_events(self) -> None:
+        """Start following go-librespot's event WebSocket in a background thread."""
+        if self._ws_thread is not None:
+            return
+        self._ws_stop.clear()
+        self._ws_thread = threading.Thread(
+            target=self._ws_loop,
+            daemon=True,
+            name="librespot-events",
+        )
+        self._ws_thread.start()
+
+    def _ws_loop(self) -> None:
+        """Keep the event WebSocket connected until close()."""
+        while not self._ws_stop.is_set():
+            self._ws = websocket.WebSocketApp(
+                self.ws_url,
+                on_open=self._on_ws_open,
+                on_message=self._on_ws_message,
+                on_error=self._on_ws_error,
+                on_close=self._on_ws_close,
+            )
+            # Pings keep idle connections open and detect half-open sockets.
+            # UTF-8 validation is left to the JSON decoder, so frames arrive as bytes.
+            self._ws.run_forever(ping_interval=20, ping_timeout=10, skip_utf8_validation=True)
+            self._set_ws_connected(False)
+            if not self._ws_stop.is_set():
+                self._reconnect_ws()
+
+    def _reconnect_ws(self) -> None:
+        """Wait before reconnecting (returns early on close()).
+
+        Backs off 1s, 2s, 4s, ... up to 16s with +/-25% jitter so repeated
+        failures don't hammer go-librespot in lockstep.
+        """
+        delay = min(self._max_reconnect_delay, 2**self._reconnect_attempt)
+        delay *= random.uniform(0.75, 1.25)
+        self._reconnect_attempt += 1
+        self._ws_stop.wait(delay)
+
+    def _set_ws_connected(self, connected: bool) -> None:
+        with self._status_lock:
+            self._ws_connected = connected
+            # Anything cached before (re)connecting may have missed events
+            self._status_snapshot = None
+            self._status_generation += 1
+
+    def _on_ws_open(self, ws: websocket.WebSocketApp) -> None:
+        LOGGER.debug("Connected to go-librespot events")
+        self._reconnect_attempt = 0
+        self._set_ws_connected(True)
+
+    def _on_ws_message(self, ws: websocket.WebSocketApp, message: str | bytes) -> None:
+        try:
+            event = _loads(message)
+        except ValueError:  # JSONDecodeError or invalid UTF-8
+            LOGGER.debug("Invalid JSON event from go-librespot")
+            return
+
+        event_type = event.get("type", "")
+        data = event.get("data") or {}
+        with self._status_lock:
+            self._status_generation += 1
+            snapshot = self._status_snapshot
+            if snapshot is not None:
+                # Unknown events drop the cache - the next read falls back to HTTP
+                self._status_snapshot = self._apply_event(snapshot, event_type, data)
+
+    def _on_ws_error(self, ws: websocket.WebSocketApp, error: Exception) -> None:
+        LOGGER.debug(f"go-librespot events error: {error}")
+
+    def _on_ws_close(self, ws: websocket.WebSocketApp, status_code: Any, msg: Any) -> None:
+        LOGGER.debug("Disconnected from go-librespot events")
+        self._set_ws_connected(False)
+
     def _parse_release_date(self, date_str: str) -> str:
         """Parse go-librespot date format to ISO format.
 
@@ -157,18 +415,15 @@ class LibrespotClient:
         if not date_str:
             return ""
         try:
-            parts = {}
-            for part in date_str.split():
-                if ":" in part:
-                    key, value = part.split(":", 1)
-                    parts[key] = int(value)
-            year = parts.get("year", 0)
-            month = parts.get("month", 1)
-            day = parts.get("day", 1)
+            match = _DATE_RE.match(date_str)
+        except TypeError:
+            return date_str
+        if match:
+            year = int(match.group(1))
+            month = int(match.group(2) or 1)
+            day = int(match.group(3) or 1)
             if year:
                 return f"{year:04d}-{month:02d}-{day:02d}"
-        except (ValueError, AttributeError):
-            pass
         return date_str  # Return original if parsing fails
 
     def _format_artists(self, artists: list) -> str:
@@ -228,28 +483,34 @@ class LibrespotClient:
 
     def set_repeat(self, mode: str) -> bool:
         """Set repeat mode: 'off', 'context', or 'track'."""
-        # go-librespot uses separate endpoints for repeat_context and repeat_track
-        if mode == "off":
-            # Disable both repeat modes
-            r1 = self._request(
-                "POST", "/player/repeat_context", json_data={"repeat_context": False}
-            )
-            r2 = self._request("POST", "/player/repeat_track", json_data={"repeat_track": False})
-            return r1 is not None and r2 is not None
-        elif mode == "context":
-            r1 = self._request("POST", "/player/repeat_track", json_data={"repeat_track": False})
-            r2 = self._request("POST", "/player/repeat_context", json_data={"repeat_context": True})
-            return r1 is not None and r2 is not None
-        elif mode == "track":
-            r1 = self._request(
-                "POST", "/player/repeat_context", json_data={"repeat_context": False}
-            )
-            r2 = self._request("POST", "/player/repeat_track", json_data={"repeat_track": True})
-            return r1 is not None and r2 is not None
-        else:
+        flags = _REPEAT_MODES.get(mode)
+        if flags is None:
             LOGGER.warning(f"Unknown repeat mode: {mode}")
             return False
 
+        # go-librespot uses separate endpoints for repeat_context and repeat_track;
+        # they're independent, so send both at once
+        repeat_context, repeat_track = flags
+        try:
+            futures = [
+                self._executor.submit(
+                    self._request,
+                    "POST",
+                    "/player/repeat_context",
+                    json_data={"repeat_context": repeat_context},
+                ),
+                self._executor.submit(
+                    self._request,
+                    "POST",
+                    "/player/repeat_track",
+                    json_data={"repeat_track": repeat_track},
+                ),
+            ]
+        except RuntimeError:  # executor shut down by close()
+            LOGGER.debug("set_repeat called on a closed client")
+            return False
+        return all(f.result() is not None for f in futures)
+
     def play_uri(self, uri: str, skip_to_uri: str | None = None) -> bool:
         """Play a Spotify URI (track, album, playlist, etc.)."""
         body: dict[str, Any] = {"uri": uri}
@@ -272,4 +533,12 @@ class LibrespotClient:
 
     def close(self) -> None:
         """Clean up resources."""
-        pass
+        self._ws_stop.set()
+        if self._ws is not None:
+            self._ws.close()
+        if self._ws_thread is not None:
+            self._ws_thread.join(timeout=2)
+            self._ws_thread = None
+        self._ws = None
+        self._executor.shutdown(wait=False)
+        self._session.close()
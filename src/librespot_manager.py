@@ -4,13 +4,16 @@ Manager for go-librespot subprocess.
 Handles starting, monitoring, and restarting go-librespot.
 """
 
+import logging
 import os
 import signal
 import socket
 import subprocess
 import threading
 import time
+from collections import deque
 from pathlib import Path
+from typing import IO
 
 import yaml
 from viam.logging import getLogger
@@ -20,6 +23,9 @@ LOGGER = getLogger("gambit-robotics:service:spotify")
 # Default paths
 DEFAULT_CONFIG_DIR = os.path.expanduser("~/.config/go-librespot")
 
+# libyaml's C emitter when PyYAML was built with it
+_YAML_DUMPER = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
 
 def _find_bundled_binary() -> str:
     """Find the go-librespot binary bundled with the module."""
@@ -72,11 +78,18 @@ class LibrespotManager:
         LOGGER.info(f"Using go-librespot binary: {self.binary_path}")
 
         self._process: subprocess.Popen | None = None
+        # Last lines of go-librespot's output, logged if it crashes
+        self._stderr_tail: deque[bytes] = deque(maxlen=50)
+        self._stderr_thread: threading.Thread | None = None
         self._monitor_thread: threading.Thread | None = None
         self._should_run = False
+        self._stop_event = threading.Event()  # wakes the monitor thread on stop()
         self._restart_count = 0
         self._max_restarts = 5
-        self._restart_delay = 2.0
+        self._restart_delay = 2.0  # doubles with each consecutive restart
+        self._stable_runtime = 60.0  # running this long resets the restart count
+        self._last_start_time: float | None = None
+        self._config_text: str | None = None  # serialized once, reused on restarts
 
     @property
     def config_path(self) -> Path:
@@ -122,13 +135,19 @@ class LibrespotManager:
         return config
 
     def _write_config(self) -> None:
-        """Write configuration to YAML file."""
-        self.config_dir.mkdir(parents=True, exist_ok=True)
-        config = self._generate_config()
+        """Write configuration to YAML file, skipping the write if it's unchanged."""
+        if self._config_text is None:
+            self._config_text = yaml.dump(
+                self._generate_config(), Dumper=_YAML_DUMPER, default_flow_style=False
+            )
 
-        with open(self.config_path, "w") as f:
-            yaml.dump(config, f, default_flow_style=False)
+        try:
+            if self.config_path.read_text() == self._config_text:
+                return
+        except FileNotFoundError:
+            self.config_dir.mkdir(parents=True, exist_ok=True)
 
+        self.config_path.write_text(self._config_text)
         LOGGER.debug(f"Wrote go-librespot config to {self.config_path}")
 
     def _check_binary(self) -> bool:
@@ -170,12 +189,21 @@ class LibrespotManager:
         self._write_config()
 
         try:
-            # Don't capture stderr - the pipe buffer can fill up and block go-librespot
             self._process = subprocess.Popen(
                 [self.binary_path, "--config_dir", str(self.config_dir)],
                 stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
+            )
+            # Drain stderr continuously - a full pipe buffer would block go-librespot
+            self._stderr_tail = deque(maxlen=self._stderr_tail.maxlen)
+            self._stderr_thread = threading.Thread(
+                target=self._drain_stderr,
+                args=(self._process.stderr, self._stderr_tail),
+                daemon=True,
+                name="librespot-stderr",
             )
+            self._stderr_thread.start()
+            self._last_start_time = time.monotonic()
             LOGGER.info(f"Started go-librespot (PID: {self._process.pid})")
             LOGGER.debug(f"Config dir: {self.config_dir}")
             return True
@@ -183,6 +211,20 @@ class LibrespotManager:
             LOGGER.error(f"Failed to start go-librespot: {e}")
             return False
 
+    def _drain_stderr(self, stream: IO[bytes], tail: deque[bytes]) -> None:
+        """Read go-librespot's stderr until it exits, keeping the last lines."""
+        with stream:
+            for line in stream:
+                tail.append(line)
+                if LOGGER.isEnabledFor(logging.DEBUG):
+                    LOGGER.debug(f"go-librespot: {line.decode(errors='replace').rstrip()}")
+
+    def _join_stderr(self) -> None:
+        """Wait for the stderr reader to hit EOF after the process exited."""
+        if self._stderr_thread is not None:
+            self._stderr_thread.join(timeout=1)
+            self._stderr_thread = None
+
     def _stop_process(self) -> None:
         """Stop the go-librespot process."""
         if self._process is None:
@@ -196,6 +238,7 @@ class LibrespotManager:
                 LOGGER.warning("go-librespot did not stop gracefully, killing...")
                 self._process.kill()
                 self._process.wait()
+            self._join_stderr()
             LOGGER.info("go-librespot stopped")
         except Exception as e:
             LOGGER.error(f"Error stopping go-librespot: {e}")
@@ -205,24 +248,42 @@ class LibrespotManager:
     def _monitor_loop(self) -> None:
         """Monitor thread that watches the process and restarts if needed."""
         while self._should_run:
-            if self._process is not None:
-                return_code = self._process.poll()
-                if return_code is not None:
-                    LOGGER.warning(f"go-librespot exited with code {return_code}")
-                    self._process = None
-
-                    if self._should_run and self._restart_count < self._max_restarts:
-                        self._restart_count += 1
-                        LOGGER.info(
-                            f"Restarting go-librespot ({self._restart_count}/{self._max_restarts})..."
-                        )
-                        time.sleep(self._restart_delay)
-                        self._start_process()
-                    elif self._restart_count >= self._max_restarts:
-                        LOGGER.error("Max restarts reached, giving up")
-                        self._should_run = False
-
-            time.sleep(1)
+            process = self._process
+            if process is None:
+                # Restart failed - nothing to watch until stop()
+                self._stop_event.wait()
+                continue
+
+            # Blocks until go-librespot exits; stop() terminates it, which wakes us too
+            return_code = process.wait()
+            if not self._should_run:
+                break
+
+            LOGGER.warning(f"go-librespot exited with code {return_code}")
+            self._join_stderr()
+            if self._stderr_tail:
+                output = b"".join(self._stderr_tail).decode(errors="replace").rstrip()
+                LOGGER.warning(f"Last go-librespot output:\n{output}")
+            self._process = None
+
+            # A crash after a long healthy run isn't part of a crash loop
+            started = self._last_start_time
+            if started is not None and time.monotonic() - started > self._stable_runtime:
+                self._restart_count = 0
+
+            if self._restart_count < self._max_restarts:
+                delay = self._restart_delay * 2**self._restart_count
+                self._restart_count += 1
+                LOGGER.info(
+                    f"Restarting go-librespot in {delay:.0f}s "
+                    f"({self._restart_count}/{self._max_restarts})..."
+                )
+                if self._stop_event.wait(delay):
+                    break
+                self._start_process()
+            else:
+                LOGGER.error("Max restarts reached, giving up")
+                self._should_run = False
 
     def start(self) -> bool:
         """Start go-librespot and monitoring thread."""
@@ -231,6 +292,7 @@ class LibrespotManager:
             return True
 
         self._should_run = True
+        self._stop_event.clear()
         self._restart_count = 0
 
         if not self._start_process():
@@ -249,6 +311,7 @@ class LibrespotManager:
     def stop(self) -> None:
         """Stop go-librespot and monitoring thread."""
         self._should_run = False
+        self._stop_event.set()
         self._stop_process()
 
         if self._monitor_thread is not None:
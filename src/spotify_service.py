@@ -9,12 +9,15 @@ Users connect from their Spotify app - no OAuth or developer app required.
 import asyncio
 import io
 from collections import OrderedDict
-from collections.abc import Mapping, Sequence
-from typing import Any, ClassVar
+from collections.abc import Awaitable, Callable, Mapping, Sequence
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, ClassVar, cast
 
 import requests
-from colorthief import ColorThief
+from PIL import Image
+from requests.adapters import HTTPAdapter
 from typing_extensions import Self
+from urllib3.util.retry import Retry
 from viam.logging import getLogger
 from viam.module.types import Reconfigurable
 from viam.proto.app.robot import ComponentConfig
@@ -30,17 +33,57 @@ from librespot_manager import LibrespotManager
 LOGGER = getLogger("gambit-robotics:service:spotify")
 
 
+# Artwork is downscaled to at most this many pixels per side before quantizing
+_PALETTE_SAMPLE_SIZE = 100
+# Spotify artwork is well under this; anything bigger isn't worth downloading
+_MAX_ARTWORK_BYTES = 2 * 1024 * 1024
+# Returned when artwork can't be fetched or decoded
+_DEFAULT_COLORS = ("#1a1a2e", "#e94560", "#0f3460")
+
+# Shared keep-alive session so consecutive artwork fetches reuse the CDN's TLS connection
+_ARTWORK_SESSION = requests.Session()
+# A couple of quick retries ride out CDN hiccups instead of caching the fallback palette
+# Retry-After is ignored so a throttled 429 can't park an executor thread for its full wait
+_ARTWORK_RETRY = Retry(
+    total=2,
+    backoff_factor=0.2,
+    status_forcelist=(429, 500, 502, 503, 504),
+    respect_retry_after_header=False,
+)
+_ARTWORK_SESSION.mount(
+    "https://", HTTPAdapter(pool_connections=2, pool_maxsize=4, max_retries=_ARTWORK_RETRY)
+)
+# JPEGs don't compress further
+_ARTWORK_SESSION.headers["Accept-Encoding"] = "identity"
+
+
 def extract_colors(image_url: str) -> list[str]:
     """Extract dominant colors from album artwork."""
     try:
-        response = requests.get(image_url, timeout=5)
-        response.raise_for_status()
-        img_data = io.BytesIO(response.content)
-        color_thief = ColorThief(img_data)
-        palette = color_thief.get_palette(color_count=3, quality=1)
-        return [f"#{r:02x}{g:02x}{b:02x}" for r, g, b in palette]
+        with _ARTWORK_SESSION.get(image_url, timeout=5, stream=True) as response:
+            response.raise_for_status()
+            data = response.raw.read(_MAX_ARTWORK_BYTES + 1, decode_content=True)
+        if len(data) > _MAX_ARTWORK_BYTES:
+            raise ValueError(f"Artwork larger than {_MAX_ARTWORK_BYTES} bytes")
+        with Image.open(io.BytesIO(data)) as img:
+            # Let JPEG decode at reduced scale, then shrink; a palette doesn't need detail
+            img.draft("RGB", (_PALETTE_SAMPLE_SIZE, _PALETTE_SAMPLE_SIZE))
+            rgb = img.convert("RGB")
+        rgb.thumbnail((_PALETTE_SAMPLE_SIZE, _PALETTE_SAMPLE_SIZE), Image.Resampling.NEAREST)
+        quantized = rgb.quantize(colors=3, method=Image.Quantize.MEDIANCUT)
+        palette = quantized.getpalette()
+        # A "P" image counts palette indices, which Pillow's stubs don't narrow to
+        counts = cast("list[tuple[int, int]] | None", quantized.getcolors())
+        if palette is None or counts is None:
+            return list(_DEFAULT_COLORS)
+        colors = []
+        # Most common color first
+        for _, index in sorted(counts, reverse=True):
+            r, g, b = palette[index * 3 : index * 3 + 3]
+            colors.append(f"#{r:02x}{g:02x}{b:02x}")
+        return colors
     except Exception:
-        return ["#1a1a2e", "#e94560", "#0f3460"]
+        return list(_DEFAULT_COLORS)
 
 
 class SpotifyService(Generic, Reconfigurable):
@@ -53,6 +96,31 @@ class SpotifyService(Generic, Reconfigurable):
     _color_cache: OrderedDict[str, list[str]] | None = None
     _color_cache_max_size: int = 100
     _startup_error: str | None = None
+    # Blocking LibrespotClient calls run here rather than on the loop's shared default pool
+    _executor: ThreadPoolExecutor | None = None
+
+    # do_command names, each handled by the _cmd_<name> method
+    _COMMANDS: ClassVar[frozenset[str]] = frozenset(
+        {
+            # Status
+            "get_status",
+            "get_current_track",
+            # Playback control
+            "play",
+            "pause",
+            "toggle_playback",
+            "next",
+            "previous",
+            "seek",
+            "set_volume",
+            "shuffle",
+            "repeat",
+            "add_to_queue",
+            "play_uri",
+            # Queue
+            "get_queue",
+        }
+    )
 
     @classmethod
     def new(
@@ -108,12 +176,18 @@ class SpotifyService(Generic, Reconfigurable):
             initial_volume=initial_volume,
         )
         self._client = LibrespotClient(api_url=self._manager.api_url)
-        self._color_cache = OrderedDict()
+        # Artwork colors don't depend on config, so keep them across reconfigures
+        if self._color_cache is None:
+            self._color_cache = OrderedDict()
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="librespot")
 
         # Start go-librespot
         self._startup_error = None
         if self._manager.start():
             LOGGER.info(f"Spotify Connect device '{device_name}' starting...")
+            self._client.start_events()
         else:
             self._startup_error = (
                 "Failed to start go-librespot. Check that the binary is installed "
@@ -129,6 +203,9 @@ class SpotifyService(Generic, Reconfigurable):
         if self._manager is not None:
             self._manager.stop()
             self._manager = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
 
     async def do_command(
         self,
@@ -139,32 +216,17 @@ class SpotifyService(Generic, Reconfigurable):
     ) -> Mapping[str, Any]:
         cmd = command.get("command", "")
 
-        handlers = {
-            # Status
-            "get_status": self._cmd_get_status,
-            "get_current_track": self._cmd_get_current_track,
-            # Playback control
-            "play": self._cmd_play,
-            "pause": self._cmd_pause,
-            "toggle_playback": self._cmd_toggle_playback,
-            "next": self._cmd_next,
-            "previous": self._cmd_previous,
-            "seek": self._cmd_seek,
-            "set_volume": self._cmd_set_volume,
-            "shuffle": self._cmd_shuffle,
-            "repeat": self._cmd_repeat,
-            "add_to_queue": self._cmd_add_to_queue,
-            "play_uri": self._cmd_play_uri,
-            # Queue
-            "get_queue": self._cmd_get_queue,
-        }
-
-        handler = handlers.get(cmd)
-        if handler:
+        if cmd in self._COMMANDS:
+            handler: Callable[[Mapping[str, Any]], Awaitable[dict]] = getattr(self, f"_cmd_{cmd}")
             return await handler(command)
 
         return {"error": f"Unknown command: {cmd}"}
 
+    async def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run a blocking client call on the service's executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
     def _check_ready(self) -> dict | None:
         """Check if service is ready for commands."""
         if self._manager is None or self._client is None:
@@ -178,18 +240,17 @@ class SpotifyService(Generic, Reconfigurable):
         return None
 
     async def _cmd_get_status(self, cmd: Mapping[str, Any]) -> dict:
-        """Get full player status."""
+        """Get full player status, plus artwork colors if include_colors is set."""
         err = self._check_ready()
         if err:
             return err
 
-        loop = asyncio.get_running_loop()
-        status = await loop.run_in_executor(None, self._client.get_status)
+        status = await self._run(self._client.get_cached_status)
 
         if status is None:
             return {"error": "Failed to get status from go-librespot"}
 
-        return {
+        result = {
             # Device/session info
             "active": status.active,
             "device_id": status.device_id,
@@ -218,6 +279,13 @@ class SpotifyService(Generic, Reconfigurable):
             "disc_number": status.track.disc_number,
         }
 
+        # Lets a UI that shows colors too skip a separate get_current_track call
+        if cmd.get("include_colors"):
+            artwork_url = status.track.artwork_url
+            result["colors"] = await self._get_colors_cached(artwork_url) if artwork_url else []
+
+        return result
+
     async def _get_colors_cached(self, artwork_url: str) -> list[str]:
         """Get colors for artwork, using LRU cache."""
         if self._color_cache is not None and artwork_url in self._color_cache:
@@ -231,8 +299,8 @@ class SpotifyService(Generic, Reconfigurable):
         if self._color_cache is None:
             self._color_cache = OrderedDict()
 
-        # Evict oldest entries if cache is full
-        while len(self._color_cache) >= self._color_cache_max_size:
+        # Entries are added one at a time, so at most one needs evicting
+        if len(self._color_cache) >= self._color_cache_max_size:
             self._color_cache.popitem(last=False)
 
         self._color_cache[artwork_url] = colors
@@ -244,8 +312,7 @@ class SpotifyService(Generic, Reconfigurable):
         if err:
             return err
 
-        loop = asyncio.get_running_loop()
-        status = await loop.run_in_executor(None, self._client.get_status)
+        status = await self._run(self._client.get_cached_status)
 
         if status is None:
             return {
@@ -290,12 +357,10 @@ class SpotifyService(Generic, Reconfigurable):
             return err
 
         uri = cmd.get("uri")
-        loop = asyncio.get_running_loop()
-
         if uri:
-            success = await loop.run_in_executor(None, self._client.play_uri, uri)
+            success = await self._run(self._client.play_uri, uri)
         else:
-            success = await loop.run_in_executor(None, self._client.resume)
+            success = await self._run(self._client.resume)
 
         return {"success": success}
 
@@ -305,8 +370,7 @@ class SpotifyService(Generic, Reconfigurable):
         if err:
             return err
 
-        loop = asyncio.get_running_loop()
-        success = await loop.run_in_executor(None, self._client.pause)
+        success = await self._run(self._client.pause)
         return {"success": success}
 
     async def _cmd_toggle_playback(self, cmd: Mapping[str, Any]) -> dict:
@@ -315,8 +379,7 @@ class SpotifyService(Generic, Reconfigurable):
         if err:
             return err
 
-        loop = asyncio.get_running_loop()
-        success = await loop.run_in_executor(None, self._client.play_pause)
+        success = await self._run(self._client.play_pause)
         return {"success": success}
 
     async def _cmd_next(self, cmd: Mapping[str, Any]) -> dict:
@@ -325,8 +388,7 @@ class SpotifyService(Generic, Reconfigurable):
         if err:
             return err
 
-        loop = asyncio.get_running_loop()
-        success = await loop.run_in_executor(None, self._client.next_track)
+        success = await self._run(self._client.next_track)
         return {"success": success}
 
     async def _cmd_previous(self, cmd: Mapping[str, Any]) -> dict:
@@ -335,8 +397,7 @@ class SpotifyService(Generic, Reconfigurable):
         if err:
             return err
 
-        loop = asyncio.get_running_loop()
-        success = await loop.run_in_executor(None, self._client.previous_track)
+        success = await self._run(self._client.previous_track)
         return {"success": success}
 
     async def _cmd_seek(self, cmd: Mapping[str, Any]) -> dict:
@@ -346,8 +407,7 @@ class SpotifyService(Generic, Reconfigurable):
             return err
 
         position_ms = cmd.get("position_ms", 0)
-        loop = asyncio.get_running_loop()
-        success = await loop.run_in_executor(None, self._client.seek, int(position_ms))
+        success = await self._run(self._client.seek, int(position_ms))
         return {"success": success}
 
     async def _cmd_set_volume(self, cmd: Mapping[str, Any]) -> dict:
@@ -358,8 +418,7 @@ class SpotifyService(Generic, Reconfigurable):
 
         volume = cmd.get("volume", 50)
         volume = max(0, min(100, int(volume)))
-        loop = asyncio.get_running_loop()
-        success = await loop.run_in_executor(None, self._client.set_volume, volume)
+        success = await self._run(self._client.set_volume, volume)
         return {"success": success}
 
     async def _cmd_shuffle(self, cmd: Mapping[str, Any]) -> dict:
@@ -369,8 +428,7 @@ class SpotifyService(Generic, Reconfigurable):
             return err
 
         state = cmd.get("state", True)
-        loop = asyncio.get_running_loop()
-        success = await loop.run_in_executor(None, self._client.set_shuffle, state)
+        success = await self._run(self._client.set_shuffle, state)
         return {"success": success}
 
     async def _cmd_repeat(self, cmd: Mapping[str, Any]) -> dict:
@@ -383,8 +441,7 @@ class SpotifyService(Generic, Reconfigurable):
         if state not in ("track", "context", "off"):
             return {"success": False, "error": "Invalid repeat state"}
 
-        loop = asyncio.get_running_loop()
-        success = await loop.run_in_executor(None, self._client.set_repeat, state)
+        success = await self._run(self._client.set_repeat, state)
         return {"success": success}
 
     async def _cmd_add_to_queue(self, cmd: Mapping[str, Any]) -> dict:
@@ -397,8 +454,7 @@ class SpotifyService(Generic, Reconfigurable):
         if not uri:
             return {"success": False, "error": "uri is required"}
 
-        loop = asyncio.get_running_loop()
-        success = await loop.run_in_executor(None, self._client.add_to_queue, uri)
+        success = await self._run(self._client.add_to_queue, uri)
         return {"success": success}
 
     async def _cmd_play_uri(self, cmd: Mapping[str, Any]) -> dict:
@@ -412,8 +468,7 @@ class SpotifyService(Generic, Reconfigurable):
             return {"success": False, "error": "uri is required"}
 
         skip_to = cmd.get("skip_to_uri")
-        loop = asyncio.get_running_loop()
-        success = await loop.run_in_executor(None, self._client.play_uri, uri, skip_to)
+        success = await self._run(self._client.play_uri, uri, skip_to)
         return {"success": success}
 
     async def _cmd_get_queue(self, cmd: Mapping[str, Any]) -> dict:
@@ -422,8 +477,7 @@ class SpotifyService(Generic, Reconfigurable):
         if err:
             return err
 
-        loop = asyncio.get_running_loop()
-        queue = await loop.run_in_executor(None, self._client.get_queue)
+        queue = await self._run(self._client.get_queue)
 
         if queue is None:
             return {"queue": [], "error": "Queue not available"}
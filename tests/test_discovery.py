@@ -1,21 +1,37 @@
 """Tests for audio discovery service."""
 
-from unittest.mock import patch
+import asyncio
+import logging
+from unittest.mock import MagicMock, patch
 
 import pytest
 
 from audio_discovery import (
+    _SUBPROCESS_CACHE,
     BACKEND_ALSA,
     BACKEND_PIPEWIRE,
     BACKEND_PULSEAUDIO,
+    CACHE_KEY_APLAY,
+    CACHE_KEY_PACTL_SINKS,
     AudioDiscovery,
+    _parse_aplay_line,
+    _pipewire_running,
 )
 
 
+@pytest.fixture(autouse=True)
+def clear_subprocess_cache():
+    """Start every test with an empty discovery cache."""
+    _SUBPROCESS_CACHE.invalidate()
+    yield
+    _SUBPROCESS_CACHE.invalidate()
+
+
 class TestAudioDiscovery:
     """Tests for AudioDiscovery service."""
 
-    def test_parse_pulseaudio_sinks(self):
+    @pytest.mark.asyncio
+    async def test_parse_pulseaudio_sinks(self):
         """Test parsing pactl list sinks output."""
         pactl_output = """Sink #0
 	Name: alsa_output.pci-0000_00_1f.3.analog-stereo
@@ -32,7 +48,7 @@ Sink #1
         discovery = AudioDiscovery("test")
 
         with patch.object(discovery, "_run_command", return_value=pactl_output):
-            sinks = discovery._discover_pulseaudio_sinks()
+            sinks = await discovery._discover_pulseaudio_sinks()
 
         assert len(sinks) == 2
 
@@ -48,16 +64,63 @@ Sink #1
         assert sinks[1]["state"] == "RUNNING"
         assert sinks[1]["sample_rate"] == 48000
 
-    def test_parse_pulseaudio_sinks_empty(self):
+    @pytest.mark.asyncio
+    async def test_parse_pulseaudio_sinks_json(self):
+        """Test parsing pactl --format=json list sinks output."""
+        pactl_json = """[
+  {"index": 0, "state": "SUSPENDED", "name": "alsa_output.analog-stereo",
+   "description": "Built-in Audio Analog Stereo",
+   "sample_specification": "s16le 2ch 44100Hz", "properties": {}},
+  {"index": 1, "state": "RUNNING", "name": "alsa_output.usb-speaker",
+   "sample_specification": "s24le 2ch 48000Hz",
+   "properties": {"device.description": "USB Speaker"}}
+]"""
+        discovery = AudioDiscovery("test")
+
+        with patch.object(discovery, "_run_command", return_value=pactl_json) as mock:
+            sinks = await discovery._discover_pulseaudio_sinks()
+
+        mock.assert_called_once_with(["pactl", "--format=json", "list", "sinks"])
+        assert len(sinks) == 2
+        assert sinks[0]["name"] == "alsa_output.analog-stereo"
+        assert sinks[0]["description"] == "Built-in Audio Analog Stereo"
+        assert sinks[0]["state"] == "SUSPENDED"
+        assert sinks[0]["sample_rate"] == 44100
+        assert sinks[0]["channels"] == 2
+        assert sinks[0]["backend"] == BACKEND_PULSEAUDIO
+        assert sinks[1]["description"] == "USB Speaker"
+        assert discovery._pactl_json_supported is True
+
+    @pytest.mark.asyncio
+    async def test_pactl_json_unsupported_falls_back(self):
+        """Test old pactl without --format=json uses the text parser and remembers it."""
+        discovery = AudioDiscovery("test")
+
+        def mock_run(cmd, *args, **kwargs):
+            if "--format=json" in cmd:
+                return None
+            return "Sink #0\n\tName: s0\n"
+
+        with patch.object(discovery, "_run_command", side_effect=mock_run) as mock:
+            sinks = await discovery._probe_pulseaudio_sinks()
+            await discovery._probe_pulseaudio_sinks()
+
+        assert sinks == [{"backend": BACKEND_PULSEAUDIO, "name": "s0"}]
+        assert discovery._pactl_json_supported is False
+        assert mock.call_count == 3
+
+    @pytest.mark.asyncio
+    async def test_parse_pulseaudio_sinks_empty(self):
         """Test parsing empty pactl output."""
         discovery = AudioDiscovery("test")
 
         with patch.object(discovery, "_run_command", return_value=None):
-            sinks = discovery._discover_pulseaudio_sinks()
+            sinks = await discovery._discover_pulseaudio_sinks()
 
         assert sinks == []
 
-    def test_parse_alsa_devices(self):
+    @pytest.mark.asyncio
+    async def test_parse_alsa_devices(self):
         """Test parsing aplay -l output."""
         aplay_output = """**** List of PLAYBACK Hardware Devices ****
 card 0: PCH [HDA Intel PCH], device 0: ALC269VC Analog [ALC269VC Analog]
@@ -70,7 +133,7 @@ card 1: USB [USB Audio], device 0: USB Audio [USB Audio]
         discovery = AudioDiscovery("test")
 
         with patch.object(discovery, "_run_command", return_value=aplay_output):
-            devices = discovery._discover_alsa_devices()
+            devices = await discovery._discover_alsa_devices()
 
         assert len(devices) == 2
 
@@ -84,82 +147,225 @@ card 1: USB [USB Audio], device 0: USB Audio [USB Audio]
         assert devices[1]["name"] == "hw:1,0"
         assert devices[1]["card_id"] == "USB"
 
-    def test_parse_alsa_devices_empty(self):
+    def test_parse_aplay_line(self):
+        """Test the split-based aplay parser and its regex fallback."""
+        assert _parse_aplay_line(
+            "card 2: Device_1 [USB Audio Device], device 3: USB Audio [USB Audio]"
+        ) == ("2", "Device_1", "USB Audio Device", "3")
+        assert _parse_aplay_line("card 1: My Card [X], device 0: D") is None
+        assert _parse_aplay_line("  Subdevice #0: subdevice #0") is None
+        assert _parse_aplay_line("card x: bad line") is None
+
+    @pytest.mark.asyncio
+    async def test_parse_alsa_devices_empty(self):
         """Test parsing empty aplay output."""
         discovery = AudioDiscovery("test")
 
         with patch.object(discovery, "_run_command", return_value=None):
-            devices = discovery._discover_alsa_devices()
+            devices = await discovery._discover_alsa_devices()
 
         assert devices == []
 
-    def test_check_audio_backend_pipewire(self):
+    @pytest.mark.asyncio
+    async def test_check_audio_backend_pipewire(self):
         """Test detecting PipeWire backend."""
         discovery = AudioDiscovery("test")
 
-        def mock_run(cmd, *args, **kwargs):
-            if cmd == ["pgrep", "-x", "pipewire"]:
-                return "12345"
-            return None
-
-        with patch.object(discovery, "_run_command", side_effect=mock_run):
-            backend = discovery._check_audio_backend()
+        with patch("audio_discovery._pipewire_running", return_value=True):
+            with patch.object(discovery, "_run_command", return_value=None):
+                backend = await discovery._check_audio_backend()
 
         assert backend == BACKEND_PIPEWIRE
 
-    def test_check_audio_backend_pulseaudio(self):
+    @pytest.mark.asyncio
+    async def test_check_audio_backend_pulseaudio(self):
         """Test detecting PulseAudio backend."""
         discovery = AudioDiscovery("test")
 
         def mock_run(cmd, *args, **kwargs):
-            if cmd == ["pgrep", "-x", "pipewire"]:
-                return None
             if cmd == ["pactl", "info"]:
                 return "Server Name: pulseaudio"
             return None
 
-        with patch.object(discovery, "_run_command", side_effect=mock_run):
-            backend = discovery._check_audio_backend()
+        with patch("audio_discovery._pipewire_running", return_value=False):
+            with patch.object(discovery, "_run_command", side_effect=mock_run):
+                backend = await discovery._check_audio_backend()
 
         assert backend == BACKEND_PULSEAUDIO
 
-    def test_check_audio_backend_alsa_fallback(self):
+    @pytest.mark.asyncio
+    async def test_check_audio_backend_alsa_fallback(self):
         """Test ALSA fallback when no PulseAudio/PipeWire."""
         discovery = AudioDiscovery("test")
 
-        with patch.object(discovery, "_run_command", return_value=None):
-            backend = discovery._check_audio_backend()
+        with patch("audio_discovery._pipewire_running", return_value=False):
+            with patch.object(discovery, "_run_command", return_value=None):
+                backend = await discovery._check_audio_backend()
 
         assert backend == BACKEND_ALSA
 
-    def test_run_command_not_found(self):
+    def test_pipewire_running_scans_proc(self, tmp_path):
+        """Test /proc scan matches the pipewire comm name exactly."""
+        for pid, comm in (("1", "systemd"), ("42", "pipewire-pulse"), ("self", "pipewire")):
+            (tmp_path / pid).mkdir()
+            (tmp_path / pid / "comm").write_text(f"{comm}\n")
+
+        assert _pipewire_running(str(tmp_path)) is False
+
+        (tmp_path / "99").mkdir()
+        (tmp_path / "99" / "comm").write_text("pipewire\n")
+
+        assert _pipewire_running(str(tmp_path)) is True
+
+    @pytest.mark.asyncio
+    async def test_run_command_not_found(self):
         """Test handling command not found."""
         discovery = AudioDiscovery("test")
 
-        with patch("subprocess.run", side_effect=FileNotFoundError()):
-            result = discovery._run_command(["nonexistent"])
+        with patch("asyncio.create_subprocess_exec", side_effect=FileNotFoundError()):
+            result = await discovery._run_command(["nonexistent"])
 
         assert result is None
 
-    def test_run_command_timeout(self):
+    @pytest.mark.asyncio
+    async def test_run_command_timeout(self):
         """Test handling command timeout."""
-        import subprocess
+        discovery = AudioDiscovery("test")
+
+        result = await discovery._run_command(["sleep", "5"], timeout=0.1)
+
+        assert result is None
 
+    @pytest.mark.asyncio
+    async def test_run_command_success(self):
+        """Test stdout is returned on success."""
         discovery = AudioDiscovery("test")
 
-        with patch("subprocess.run", side_effect=subprocess.TimeoutExpired("cmd", 5)):
-            result = discovery._run_command(["slow_command"])
+        result = await discovery._run_command(["echo", "hello"])
+
+        assert result == "hello\n"
+
+    @pytest.mark.asyncio
+    async def test_run_command_nonzero_exit(self):
+        """Test non-zero exit returns None."""
+        discovery = AudioDiscovery("test")
+
+        result = await discovery._run_command(["false"])
 
         assert result is None
 
 
+class TestAudioDiscoveryCache:
+    """Tests for cached subprocess discovery."""
+
+    @pytest.mark.asyncio
+    async def test_sinks_cached_between_calls(self):
+        """Test repeated sink discovery reuses the parsed result."""
+        discovery = AudioDiscovery("test")
+
+        with patch.object(discovery, "_run_command", return_value="Sink #0\n\tName: s0\n") as mock:
+            first = await discovery._discover_pulseaudio_sinks()
+            second = await discovery._discover_pulseaudio_sinks()
+
+        assert first == second
+        # JSON attempt + text fallback on the miss, nothing on the hit
+        assert mock.call_count == 2
+        assert discovery._cache_misses == 1
+        assert discovery._cache_hits == 1
+
+    @pytest.mark.asyncio
+    async def test_cache_expires_after_ttl(self):
+        """Test stale entries are re-probed."""
+        discovery = AudioDiscovery("test")
+
+        with patch.object(discovery, "_run_command", return_value=None) as mock:
+            with patch("audio_discovery.time") as mock_time:
+                mock_time.monotonic.side_effect = [0.0, 100.0, 100.0]
+                await discovery._discover_alsa_devices()
+                await discovery._discover_alsa_devices()
+
+        assert mock.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_invalidate_forces_reprobe(self):
+        """Test invalidate_cache drops cached results."""
+        discovery = AudioDiscovery("test")
+
+        with patch("audio_discovery._pipewire_running", return_value=False):
+            with patch.object(discovery, "_run_command", return_value=None) as mock:
+                await discovery._check_audio_backend()
+                discovery.invalidate_cache()
+                await discovery._check_audio_backend()
+
+        # One pactl info per probe
+        assert mock.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_invalidate_during_probe_discards_result(self):
+        """Test a probe that started before invalidate() doesn't cache its result."""
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def slow_sinks():
+            started.set()
+            await release.wait()
+            return [{"name": "before-hotplug"}]
+
+        async def new_sinks():
+            return [{"name": "after-hotplug"}]
+
+        probe = asyncio.create_task(_SUBPROCESS_CACHE.get(CACHE_KEY_PACTL_SINKS, 60, slow_sinks))
+        await started.wait()
+        _SUBPROCESS_CACHE.invalidate(CACHE_KEY_PACTL_SINKS)
+        release.set()
+
+        assert await probe == ([{"name": "before-hotplug"}], False)
+        value, hit = await _SUBPROCESS_CACHE.get(CACHE_KEY_PACTL_SINKS, 60, new_sinks)
+        assert hit is False
+        assert value == [{"name": "after-hotplug"}]
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_share_one_probe(self):
+        """Test concurrent misses on a key wait for a single probe."""
+        calls = 0
+
+        async def sinks():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return [{"name": "sink"}]
+
+        results = await asyncio.gather(
+            *(_SUBPROCESS_CACHE.get(CACHE_KEY_PACTL_SINKS, 60, sinks) for _ in range(3))
+        )
+
+        assert calls == 1
+        assert all(value == [{"name": "sink"}] for value, _ in results)
+
+    @pytest.mark.asyncio
+    async def test_failed_probe_not_cached(self):
+        """Test a probe that raises is re-run on the next call."""
+
+        async def failing():
+            raise RuntimeError("boom")
+
+        async def sinks():
+            return []
+
+        with pytest.raises(RuntimeError):
+            await _SUBPROCESS_CACHE.get(CACHE_KEY_PACTL_SINKS, 60, failing)
+        _, hit = await _SUBPROCESS_CACHE.get(CACHE_KEY_PACTL_SINKS, 60, sinks)
+        assert hit is False
+
+
 class TestAudioDiscoveryAsync:
     """Tests for async discovery methods."""
 
     @pytest.mark.asyncio
     async def test_discover_resources_unique_names(self):
         """Test that duplicate device descriptions get unique names."""
-        discovery = AudioDiscovery("test")
+        with patch("platform.system", return_value="Linux"):
+            discovery = AudioDiscovery("test")
 
         # Mock two PulseAudio devices with same description
         duplicate_sinks = [
@@ -169,10 +375,11 @@ class TestAudioDiscoveryAsync:
         ]
 
         with patch.object(discovery, "_check_audio_backend", return_value="pulseaudio"):
-            with patch.object(discovery, "_discover_pulseaudio_sinks", return_value=duplicate_sinks):
+            with patch.object(
+                discovery, "_discover_pulseaudio_sinks", return_value=duplicate_sinks
+            ):
                 with patch.object(discovery, "_discover_alsa_devices", return_value=[]):
-                    with patch("platform.system", return_value="Linux"):
-                        configs = await discovery.discover_resources()
+                    configs = await discovery.discover_resources()
 
         # Should have 3 configs with unique names
         assert len(configs) == 3
@@ -180,3 +387,151 @@ class TestAudioDiscoveryAsync:
         assert names[0] == "usb-audio"
         assert names[1] == "usb-audio-2"
         assert names[2] == "usb-audio-3"
+
+    @pytest.mark.asyncio
+    async def test_watcher_invalidates_on_sink_event(self):
+        """Test pactl subscribe sink events drop the cached sink list."""
+        discovery = AudioDiscovery("test")
+
+        async def old_sinks():
+            return [{"name": "old"}]
+
+        async def no_sinks():
+            return []
+
+        await _SUBPROCESS_CACHE.get(CACHE_KEY_PACTL_SINKS, 60, old_sinks)
+
+        stdout = asyncio.StreamReader()
+        stdout.feed_data(b"Event 'change' on sink-input #4\nEvent 'new' on sink #7\n")
+        mock_proc = MagicMock(stdout=stdout, returncode=None)
+
+        async def fake_exec(*args, **kwargs):
+            return mock_proc
+
+        with patch("asyncio.create_subprocess_exec", side_effect=fake_exec):
+            task = asyncio.create_task(discovery._watch_device_events())
+            for _ in range(10):
+                await asyncio.sleep(0)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        _, hit = await _SUBPROCESS_CACHE.get(CACHE_KEY_PACTL_SINKS, 60, no_sinks)
+        assert hit is False
+        mock_proc.kill.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_watcher_invalidates_on_alsa_card_change(self, tmp_path):
+        """Test a change in /proc/asound/cards contents drops the cached aplay list."""
+        discovery = AudioDiscovery("test")
+        cards = tmp_path / "cards"
+        cards.write_text(" 0 [PCH            ]: HDA-Intel\n")
+
+        async def old_devices():
+            return [{"name": "old"}]
+
+        async def no_devices():
+            return []
+
+        async def no_pactl(*args, **kwargs):
+            raise OSError("pactl not found")
+
+        with (
+            patch("audio_discovery.ALSA_CARDS_PATH", str(cards)),
+            patch("audio_discovery.ALSA_POLL_INTERVAL", 0.01),
+            patch("asyncio.create_subprocess_exec", side_effect=no_pactl),
+        ):
+            task = asyncio.create_task(discovery._watch_device_events())
+            await asyncio.sleep(0.03)
+            await _SUBPROCESS_CACHE.get(CACHE_KEY_APLAY, 60, old_devices)
+            await asyncio.sleep(0.03)
+
+            # Unchanged contents keep the cache
+            _, hit = await _SUBPROCESS_CACHE.get(CACHE_KEY_APLAY, 60, no_devices)
+            assert hit is True
+
+            cards.write_text(" 0 [PCH            ]: HDA-Intel\n 1 [Device         ]: USB-Audio\n")
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        _, hit = await _SUBPROCESS_CACHE.get(CACHE_KEY_APLAY, 60, no_devices)
+        assert hit is False
+
+    @pytest.mark.asyncio
+    async def test_close_cancels_watcher(self):
+        """Test close stops the hotplug watcher."""
+        discovery = AudioDiscovery("test")
+
+        async def idle():
+            await asyncio.sleep(60)
+
+        with patch.object(discovery, "_watch_device_events", side_effect=idle):
+            discovery.reconfigure(MagicMock(), {})
+            assert discovery._watch_task is not None
+            assert discovery._executor is not None
+            await discovery.close()
+
+        assert discovery._watch_task is None
+        assert discovery._executor is None
+
+    @pytest.mark.asyncio
+    async def test_discover_resources_attributes(self):
+        """Test discovered configs carry backend, device and name attributes."""
+        with patch("platform.system", return_value="Linux"):
+            discovery = AudioDiscovery("test")
+
+        sinks = [{"name": "alsa_output.usb", "description": "USB Audio", "backend": "pulseaudio"}]
+        alsa = [{"name": "hw:1,0", "description": "USB Audio", "backend": "alsa"}]
+
+        with patch.object(discovery, "_check_audio_backend", return_value="pulseaudio"):
+            with patch.object(discovery, "_discover_pulseaudio_sinks", return_value=sinks):
+                with patch.object(discovery, "_discover_alsa_devices", return_value=alsa):
+                    configs = await discovery.discover_resources()
+
+        fields = configs[0].attributes.fields
+        assert fields["audio_backend"].string_value == BACKEND_PULSEAUDIO
+        assert fields["audio_device"].string_value == "alsa_output.usb"
+        assert fields["device_name"].string_value == "USB Audio"
+
+        fields = configs[1].attributes.fields
+        assert fields["audio_backend"].string_value == BACKEND_ALSA
+        assert fields["audio_device"].string_value == "hw:1,0"
+
+    @pytest.mark.asyncio
+    async def test_discover_resources_non_linux(self):
+        """Test discovery is a no-op off Linux."""
+        with patch("platform.system", return_value="Darwin"):
+            discovery = AudioDiscovery("test")
+
+        with patch.object(discovery, "_discover_pulseaudio_sinks") as mock:
+            configs = await discovery.discover_resources()
+
+        assert configs == []
+        mock.assert_not_called()
+
+    def test_init_accepts_logger(self):
+        """Test the SDK's logger keyword is passed through to the base class."""
+        logger = logging.getLogger("test-discovery")
+        discovery = AudioDiscovery("test", logger=logger)
+
+        assert discovery.logger is logger
+
+    @pytest.mark.asyncio
+    async def test_discover_resources_missing_fields(self):
+        """Test devices without name/description get fallback values."""
+        with patch("platform.system", return_value="Linux"):
+            discovery = AudioDiscovery("test")
+
+        with patch.object(discovery, "_check_audio_backend", return_value="alsa"):
+            with patch.object(discovery, "_discover_pulseaudio_sinks", return_value=[]):
+                with patch.object(
+                    discovery, "_discover_alsa_devices", return_value=[{"description": ""}]
+                ):
+                    configs = await discovery.discover_resources()
+
+        assert configs[0].name == "speaker-0"
+        fields = configs[0].attributes.fields
+        assert fields["audio_device"].string_value == "default"
+        assert fields["device_name"].string_value == "Speaker"
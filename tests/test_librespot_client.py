@@ -1,8 +1,9 @@
 """Tests for librespot client."""
 
+import json
 from unittest.mock import MagicMock, patch
 
-from librespot_client import LibrespotClient
+from librespot_client import LibrespotClient, PlayerStatus, TrackMetadata
 
 
 class TestLibrespotClientParsing:
@@ -130,6 +131,29 @@ class TestLibrespotClientParsing:
         assert status.track.track_number == 3
         assert status.track.disc_number == 1
 
+    def test_parse_status_reuses_track_text(self):
+        """Test artist/date formatting is skipped for a recently parsed URI."""
+        client = LibrespotClient()
+        data = {"track": {"uri": "spotify:track:1", "artist_names": ["A"]}}
+
+        client._parse_status(data)
+        with patch.object(client, "_format_artists") as mock_format:
+            status = client._parse_status(data)
+
+        mock_format.assert_not_called()
+        assert status.track.artist == "A"
+
+    def test_track_text_cache_bounded(self):
+        """Test only the last few URIs are kept."""
+        client = LibrespotClient()
+
+        for i in range(10):
+            client._parse_status({"track": {"uri": f"spotify:track:{i}"}})
+
+        assert len(client._track_cache) == client._track_cache_max_size
+        assert "spotify:track:9" in client._track_cache
+        assert "spotify:track:0" not in client._track_cache
+
     def test_parse_status_stopped(self):
         """Test parsing status when stopped."""
         client = LibrespotClient()
@@ -167,7 +191,7 @@ class TestLibrespotClientRequests:
 
         client = LibrespotClient()
 
-        with patch("librespot_client.requests.request") as mock_request:
+        with patch.object(client._session, "request") as mock_request:
             mock_request.side_effect = req_module.exceptions.ConnectionError("Connection refused")
             result = client._request("GET", "/status")
 
@@ -179,7 +203,7 @@ class TestLibrespotClientRequests:
 
         client = LibrespotClient()
 
-        with patch("requests.request") as mock_request:
+        with patch.object(client._session, "request") as mock_request:
             mock_request.side_effect = requests.exceptions.Timeout()
             result = client._request("GET", "/status")
 
@@ -190,10 +214,9 @@ class TestLibrespotClientRequests:
         client = LibrespotClient()
 
         mock_response = MagicMock()
-        mock_response.text = '{"status": "ok"}'
-        mock_response.json.return_value = {"status": "ok"}
+        mock_response.content = b'{"status": "ok"}'
 
-        with patch("requests.request", return_value=mock_response):
+        with patch.object(client._session, "request", return_value=mock_response):
             result = client._request("GET", "/status")
 
         assert result == {"status": "ok"}
@@ -203,13 +226,61 @@ class TestLibrespotClientRequests:
         client = LibrespotClient()
 
         mock_response = MagicMock()
-        mock_response.text = ""
+        mock_response.content = b""
 
-        with patch("requests.request", return_value=mock_response):
+        with patch.object(client._session, "request", return_value=mock_response):
             result = client._request("POST", "/player/pause")
 
         assert result == {}
 
+    def test_request_uses_session(self):
+        """Test requests go through the persistent session."""
+        client = LibrespotClient(api_url="http://127.0.0.1:1234/")
+
+        mock_response = MagicMock()
+        mock_response.content = b""
+
+        with patch.object(client._session, "request", return_value=mock_response) as mock:
+            client._request("POST", "/player/seek", json_data={"position": 10})
+            client._request("POST", "/player/pause")
+
+        assert mock.call_count == 2
+        assert mock.call_args_list[0].kwargs["url"] == "http://127.0.0.1:1234/player/seek"
+
+    def test_close_closes_session(self):
+        """Test close releases pooled connections."""
+        client = LibrespotClient()
+
+        with patch.object(client._session, "close") as mock_close:
+            client.close()
+
+        mock_close.assert_called_once()
+
+    def test_request_invalid_json(self):
+        """Test invalid JSON body returns None."""
+        client = LibrespotClient()
+
+        mock_response = MagicMock()
+        mock_response.content = b"not json"
+
+        with patch.object(client._session, "request", return_value=mock_response):
+            result = client._request("GET", "/status")
+
+        assert result is None
+
+    def test_request_invalid_utf8_with_stdlib_json(self):
+        """Test non-UTF-8 body returns None when orjson isn't installed."""
+        client = LibrespotClient()
+
+        mock_response = MagicMock()
+        mock_response.content = b'{"name": "\x80"}'
+
+        with patch.object(client._session, "request", return_value=mock_response):
+            with patch("librespot_client._loads", json.loads):
+                result = client._request("GET", "/status")
+
+        assert result is None
+
     def test_is_available_true(self):
         """Test is_available returns True when API responds."""
         client = LibrespotClient()
@@ -225,6 +296,218 @@ class TestLibrespotClientRequests:
             assert client.is_available() is False
 
 
+def _connected_client(status: PlayerStatus) -> LibrespotClient:
+    """Client with an open event socket and a primed status cache."""
+    client = LibrespotClient()
+    client._on_ws_open(MagicMock())
+    with patch.object(client, "get_status", return_value=status):
+        client.get_cached_status()
+    return client
+
+
+def _event(event_type: str, data: dict | None = None) -> str:
+    return json.dumps({"type": event_type, "data": data or {}})
+
+
+class TestLibrespotClientEvents:
+    """Tests for the event-driven status cache."""
+
+    def test_ws_url(self):
+        """Test WebSocket URL is derived from the API URL."""
+        client = LibrespotClient(api_url="http://127.0.0.1:1234")
+        assert client.ws_url == "ws://127.0.0.1:1234/events"
+
+    def test_cached_status_uses_http_when_disconnected(self):
+        """Test every read hits HTTP without an event socket."""
+        client = LibrespotClient()
+
+        with patch.object(client, "get_status", return_value=PlayerStatus()) as mock:
+            client.get_cached_status()
+            client.get_cached_status()
+
+        assert mock.call_count == 2
+
+    def test_cached_status_served_from_cache_when_connected(self):
+        """Test reads need no HTTP once the cache is primed over a live socket."""
+        client = _connected_client(PlayerStatus(active=True))
+
+        with patch.object(client, "get_status") as mock:
+            status = client.get_cached_status()
+
+        mock.assert_not_called()
+        assert status.active is True
+
+    def test_volume_event_updates_cache(self):
+        """Test volume events update the cached status in place."""
+        client = _connected_client(PlayerStatus(track=TrackMetadata(volume=10)))
+
+        client._on_ws_message(MagicMock(), _event("volume", {"value": 40, "max": 64}))
+
+        with patch.object(client, "get_status") as mock:
+            status = client.get_cached_status()
+        mock.assert_not_called()
+        assert status.track.volume == 40
+
+    def test_metadata_event_replaces_track(self):
+        """Test metadata events swap the track but keep player state."""
+        client = _connected_client(
+            PlayerStatus(track=TrackMetadata(uri="spotify:track:old", volume=30, shuffle=True))
+        )
+
+        client._on_ws_message(
+            MagicMock(),
+            _event(
+                "metadata",
+                {
+                    "uri": "spotify:track:new",
+                    "name": "New Song",
+                    "artist_names": ["A", "B"],
+                    "duration": 1000,
+                    "release_date": "year:2001",
+                },
+            ),
+        )
+
+        status = client.get_cached_status()
+        assert status.track.uri == "spotify:track:new"
+        assert status.track.artist == "A, B"
+        assert status.track.release_date == "2001-01-01"
+        assert status.track.volume == 30
+        assert status.track.shuffle is True
+
+    def test_pause_and_play_events(self):
+        """Test playing/paused/stopped events flip playback state."""
+        client = _connected_client(PlayerStatus())
+
+        client._on_ws_message(MagicMock(), _event("playing"))
+        assert client.get_cached_status().track.is_playing is True
+
+        client._on_ws_message(MagicMock(), _event("paused"))
+        assert client.get_cached_status().track.is_playing is False
+
+        client._on_ws_message(MagicMock(), _event("stopped"))
+        assert client.get_cached_status().active is False
+
+    def test_progress_advances_while_playing(self):
+        """Test cached progress is extrapolated from elapsed play time."""
+        status = PlayerStatus(track=TrackMetadata(is_playing=True, duration_ms=5000))
+        with patch("librespot_client.time.monotonic", return_value=100.0):
+            client = _connected_client(status)
+        with patch("librespot_client.time.monotonic", return_value=101.5):
+            assert client.get_cached_status().track.progress_ms == 1500
+        with patch("librespot_client.time.monotonic", return_value=200.0):
+            assert client.get_cached_status().track.progress_ms == 5000
+
+    def test_seek_event_sets_progress(self):
+        """Test seek events set the cached position."""
+        client = _connected_client(PlayerStatus())
+
+        client._on_ws_message(MagicMock(), _event("seek", {"position": 42000}))
+
+        assert client.get_cached_status().track.progress_ms == 42000
+
+    def test_shuffle_and_repeat_events(self):
+        """Test toggle events set their flag without touching other state."""
+        client = _connected_client(PlayerStatus(track=TrackMetadata(name="Song", volume=30)))
+
+        client._on_ws_message(MagicMock(), _event("shuffle_context", {"value": True}))
+        client._on_ws_message(MagicMock(), _event("repeat_track", {"value": True}))
+
+        track = client.get_cached_status().track
+        assert track.shuffle is True
+        assert track.repeat_track is True
+        assert track.repeat_context is False
+        assert track.name == "Song"
+        assert track.volume == 30
+
+    def test_value_event_without_value_keeps_cache(self):
+        """Test a value event missing its payload leaves the cached value alone."""
+        client = _connected_client(PlayerStatus(track=TrackMetadata(volume=30)))
+
+        client._on_ws_message(MagicMock(), _event("volume"))
+
+        with patch.object(client, "get_status") as mock:
+            status = client.get_cached_status()
+        mock.assert_not_called()
+        assert status.track.volume == 30
+
+    def test_unknown_event_falls_back_to_http(self):
+        """Test unhandled events drop the cache so the next read refetches."""
+        client = _connected_client(PlayerStatus())
+
+        client._on_ws_message(MagicMock(), _event("something_new"))
+
+        with patch.object(client, "get_status", return_value=PlayerStatus()) as mock:
+            client.get_cached_status()
+        mock.assert_called_once()
+
+    def test_disconnect_drops_cache(self):
+        """Test a closed socket reverts to HTTP reads."""
+        client = _connected_client(PlayerStatus())
+
+        client._on_ws_close(MagicMock(), None, None)
+
+        with patch.object(client, "get_status", return_value=PlayerStatus()) as mock:
+            client.get_cached_status()
+            client.get_cached_status()
+        assert mock.call_count == 2
+
+    def test_close_stops_event_thread(self):
+        """Test close stops the reconnect loop promptly."""
+        client = LibrespotClient()
+
+        with patch("librespot_client.websocket.WebSocketApp") as mock_app:
+            mock_app.return_value.run_forever.return_value = False
+            client.start_events()
+            client.close()
+
+        assert client._ws_thread is None
+        assert mock_app.called
+
+    def test_invalid_event_frames_ignored(self):
+        """Test malformed frames don't touch the cache."""
+        client = _connected_client(PlayerStatus(track=TrackMetadata(volume=10)))
+
+        client._on_ws_message(MagicMock(), b"\xff\xfe")
+        client._on_ws_message(MagicMock(), b"not json")
+
+        with patch.object(client, "get_status") as mock:
+            assert client.get_cached_status().track.volume == 10
+        mock.assert_not_called()
+
+    def test_bytes_event_frame(self):
+        """Test events delivered as bytes are decoded."""
+        client = _connected_client(PlayerStatus())
+
+        client._on_ws_message(MagicMock(), _event("volume", {"value": 33}).encode())
+
+        assert client.get_cached_status().track.volume == 33
+
+    def test_reconnect_backoff(self):
+        """Test reconnect delay doubles up to the cap and resets on open."""
+        client = LibrespotClient()
+
+        with patch("librespot_client.random.uniform", return_value=1.0):
+            with patch.object(client._ws_stop, "wait") as mock_wait:
+                for _ in range(7):
+                    client._reconnect_ws()
+
+        delays = [c.args[0] for c in mock_wait.call_args_list]
+        assert delays == [1, 2, 4, 8, 16, 16, 16]
+
+        client._on_ws_open(MagicMock())
+        assert client._reconnect_attempt == 0
+
+    def test_snapshot_isolated_from_updates(self):
+        """Test returned statuses aren't mutated by later events."""
+        client = _connected_client(PlayerStatus(track=TrackMetadata(volume=10)))
+        before = client.get_cached_status()
+
+        client._on_ws_message(MagicMock(), _event("volume", {"value": 60}))
+
+        assert before.track.volume == 10
+
+
 class TestLibrespotClientPlayback:
     """Tests for LibrespotClient playback control."""
 
@@ -335,6 +618,36 @@ class TestLibrespotClientPlayback:
         assert result is True
         assert mock.call_count == 2
 
+    def test_set_repeat_context_flags(self):
+        """Test repeat context enables context and disables track repeat."""
+        client = LibrespotClient()
+
+        with patch.object(client, "_request", return_value={}) as mock:
+            result = client.set_repeat("context")
+
+        assert result is True
+        mock.assert_any_call(
+            "POST", "/player/repeat_context", json_data={"repeat_context": True}
+        )
+        mock.assert_any_call("POST", "/player/repeat_track", json_data={"repeat_track": False})
+
+    def test_set_repeat_partial_failure(self):
+        """Test set repeat fails if either endpoint fails."""
+        client = LibrespotClient()
+
+        def mock_request(method, endpoint, **kwargs):
+            return None if endpoint == "/player/repeat_track" else {}
+
+        with patch.object(client, "_request", side_effect=mock_request):
+            assert client.set_repeat("off") is False
+
+    def test_set_repeat_after_close(self):
+        """Test set_repeat on a closed client fails like other controls instead of raising."""
+        client = LibrespotClient()
+        client.close()
+
+        assert client.set_repeat("off") is False
+
     def test_set_repeat_invalid(self):
         """Test set repeat with invalid mode."""
         client = LibrespotClient()
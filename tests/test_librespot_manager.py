@@ -1,6 +1,7 @@
 """Tests for librespot manager."""
 
 import os
+import time
 from pathlib import Path
 from unittest.mock import MagicMock, patch
 
@@ -76,6 +77,29 @@ class TestLibrespotManagerConfig:
         assert config["audio_backend"] == "alsa"
         assert config["audio_device"] == "hw:0,0"
 
+    def test_write_config(self, tmp_path):
+        """Test config is written as YAML, creating the config dir."""
+        import yaml
+
+        manager = LibrespotManager(device_name="Test", config_dir=str(tmp_path / "cfg"))
+
+        manager._write_config()
+
+        assert yaml.safe_load(manager.config_path.read_text()) == manager._generate_config()
+
+    def test_write_config_skips_unchanged(self, tmp_path):
+        """Test restarts don't rewrite an identical config file."""
+        manager = LibrespotManager(device_name="Test", config_dir=str(tmp_path))
+        manager._write_config()
+
+        with patch("pathlib.Path.write_text") as mock_write:
+            manager._write_config()
+        mock_write.assert_not_called()
+
+        manager.config_path.write_text("stale: true\n")
+        manager._write_config()
+        assert "stale" not in manager.config_path.read_text()
+
 
 class TestLibrespotManagerBinaryCheck:
     """Tests for binary existence checks."""
@@ -232,6 +256,38 @@ class TestLibrespotManagerRestarts:
         manager = LibrespotManager(device_name="Test")
         assert manager._restart_delay == 2.0
 
+    def test_restart_delay_backs_off(self):
+        """Test consecutive restarts double the delay."""
+        manager = LibrespotManager(device_name="Test")
+        manager._should_run = True
+        manager._restart_count = 2
+        manager._last_start_time = time.monotonic()
+        manager._process = MagicMock()
+        manager._process.wait.return_value = 1
+        manager._stop_event = MagicMock()
+        manager._stop_event.wait.return_value = True  # stop during the delay
+
+        manager._monitor_loop()
+
+        manager._stop_event.wait.assert_called_once_with(8.0)
+        assert manager._restart_count == 3
+
+    def test_restart_count_resets_after_stable_run(self):
+        """Test a crash after a long healthy run restarts with the base delay."""
+        manager = LibrespotManager(device_name="Test")
+        manager._should_run = True
+        manager._restart_count = manager._max_restarts
+        manager._last_start_time = time.monotonic() - 120
+        manager._process = MagicMock()
+        manager._process.wait.return_value = 1
+        manager._stop_event = MagicMock()
+        manager._stop_event.wait.return_value = True
+
+        manager._monitor_loop()
+
+        manager._stop_event.wait.assert_called_once_with(2.0)
+        assert manager._restart_count == 1
+
     def test_restart_count_reset_on_start(self):
         """Test restart count is reset when start is called."""
         manager = LibrespotManager(device_name="Test")
@@ -241,3 +297,69 @@ class TestLibrespotManagerRestarts:
             manager.start()
 
         assert manager._restart_count == 0
+
+    def test_monitor_restarts_after_exit(self):
+        """Test the monitor restarts go-librespot when it exits."""
+        manager = LibrespotManager(device_name="Test")
+        manager._should_run = True
+        manager._restart_delay = 0
+        manager._process = MagicMock()
+        manager._process.wait.return_value = 1
+
+        def restart():
+            manager._should_run = False  # end the loop after one restart
+            return True
+
+        with patch.object(manager, "_start_process", side_effect=restart) as mock_start:
+            manager._monitor_loop()
+
+        mock_start.assert_called_once()
+        assert manager._restart_count == 1
+
+    def test_monitor_gives_up_after_max_restarts(self):
+        """Test the monitor stops restarting once max restarts is reached."""
+        manager = LibrespotManager(device_name="Test")
+        manager._should_run = True
+        manager._restart_count = manager._max_restarts
+        manager._process = MagicMock()
+        manager._process.wait.return_value = 1
+
+        with patch.object(manager, "_start_process") as mock_start:
+            manager._monitor_loop()
+
+        mock_start.assert_not_called()
+        assert manager._should_run is False
+
+    def test_stop_wakes_idle_monitor(self):
+        """Test stop() ends a monitor thread that has no process to watch."""
+        import threading
+
+        manager = LibrespotManager(device_name="Test")
+        manager._should_run = True
+        manager._monitor_thread = threading.Thread(target=manager._monitor_loop, daemon=True)
+        manager._monitor_thread.start()
+        thread = manager._monitor_thread
+
+        manager.stop()
+
+        thread.join(timeout=1)
+        assert not thread.is_alive()
+
+    def test_crash_output_captured(self, tmp_path):
+        """Test go-librespot's stderr is drained and its tail kept for crash logs."""
+        script = tmp_path / "go-librespot"
+        script.write_text("#!/bin/sh\necho 'first' >&2\necho 'boom' >&2\nexit 3\n")
+        script.chmod(0o755)
+        manager = LibrespotManager(
+            device_name="Test", binary_path=str(script), config_dir=str(tmp_path)
+        )
+        manager._should_run = True
+        manager._max_restarts = 0
+
+        with patch.object(manager, "_check_port_available", return_value=True):
+            assert manager._start_process() is True
+        with patch("librespot_manager.LOGGER") as logger:
+            manager._monitor_loop()
+
+        assert list(manager._stderr_tail) == [b"first\n", b"boom\n"]
+        assert "boom" in logger.warning.call_args_list[-1].args[0]
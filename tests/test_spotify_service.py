@@ -1,12 +1,23 @@
 """Tests for Spotify service."""
 
+import io
+import threading
 from collections import OrderedDict
 from unittest.mock import MagicMock, patch
 
 import pytest
+from PIL import Image
 
 from librespot_client import PlayerStatus, TrackMetadata
-from spotify_service import SpotifyService, extract_colors
+from spotify_service import _ARTWORK_SESSION, _MAX_ARTWORK_BYTES, SpotifyService, extract_colors
+
+
+def _artwork_response(data: bytes) -> MagicMock:
+    """Build a mock streamed artwork response carrying data."""
+    response = MagicMock()
+    response.__enter__.return_value = response
+    response.raw.read.side_effect = lambda n, decode_content=False: data[:n]
+    return response
 
 
 class TestExtractColors:
@@ -14,32 +25,65 @@ class TestExtractColors:
 
     def test_extract_colors_fallback_on_error(self):
         """Test color extraction returns fallback on error."""
-        with patch("requests.get", side_effect=Exception("Network error")):
+        with patch("spotify_service._ARTWORK_SESSION.get", side_effect=Exception("Network error")):
             colors = extract_colors("http://invalid-url")
 
         assert len(colors) == 3
         assert colors == ["#1a1a2e", "#e94560", "#0f3460"]
 
     def test_extract_colors_success(self):
-        """Test successful color extraction."""
-        mock_response = MagicMock()
-        mock_response.content = b"fake image data"
-        mock_response.raise_for_status = MagicMock()
-
-        with patch("spotify_service.requests.get", return_value=mock_response):
-            with patch("spotify_service.ColorThief") as mock_ct:
-                mock_ct_instance = MagicMock()
-                mock_ct_instance.get_palette.return_value = [
-                    (255, 0, 0),
-                    (0, 255, 0),
-                    (0, 0, 255),
-                ]
-                mock_ct.return_value = mock_ct_instance
-
-                colors = extract_colors("http://example.com/image.jpg")
+        """Test successful color extraction, most common color first."""
+        img = Image.new("RGB", (300, 300), (0, 0, 255))
+        img.paste((255, 0, 0), (0, 0, 300, 150))
+        img.paste((0, 255, 0), (0, 150, 300, 240))
+        buf = io.BytesIO()
+        img.save(buf, format="PNG")
+
+        response = _artwork_response(buf.getvalue())
+        with patch("spotify_service._ARTWORK_SESSION.get", return_value=response):
+            colors = extract_colors("http://example.com/image.png")
 
         assert colors == ["#ff0000", "#00ff00", "#0000ff"]
 
+    def test_extract_colors_invalid_image(self):
+        """Test undecodable artwork falls back to the default palette."""
+        with patch("spotify_service._ARTWORK_SESSION.get", return_value=_artwork_response(b"fake")):
+            colors = extract_colors("http://example.com/image.jpg")
+
+        assert colors == ["#1a1a2e", "#e94560", "#0f3460"]
+
+    def test_extract_colors_no_color_counts(self):
+        """Test a quantized image without color counts falls back to the default palette."""
+        buf = io.BytesIO()
+        Image.new("RGB", (10, 10), (0, 0, 255)).save(buf, format="PNG")
+
+        response = _artwork_response(buf.getvalue())
+        with patch("spotify_service._ARTWORK_SESSION.get", return_value=response):
+            with patch.object(Image.Image, "getcolors", return_value=None):
+                colors = extract_colors("http://example.com/image.png")
+
+        assert colors == ["#1a1a2e", "#e94560", "#0f3460"]
+
+    def test_extract_colors_oversized_artwork(self):
+        """Test artwork over the size cap isn't decoded."""
+        response = _artwork_response(b"x" * (_MAX_ARTWORK_BYTES + 1))
+
+        with patch("spotify_service._ARTWORK_SESSION.get", return_value=response):
+            with patch("spotify_service.Image.open") as mock_open:
+                colors = extract_colors("http://example.com/huge.jpg")
+
+        mock_open.assert_not_called()
+        assert colors == ["#1a1a2e", "#e94560", "#0f3460"]
+        response.raw.read.assert_called_once_with(_MAX_ARTWORK_BYTES + 1, decode_content=True)
+
+    def test_artwork_retries_ignore_retry_after(self):
+        """Test artwork retries use their own short backoff, not the server's Retry-After."""
+        retry = _ARTWORK_SESSION.get_adapter("https://i.scdn.co/image/abc").max_retries
+
+        assert retry.total == 2
+        assert 429 in retry.status_forcelist
+        assert retry.respect_retry_after_header is False
+
 
 class TestSpotifyServiceConfig:
     """Tests for SpotifyService configuration."""
@@ -198,6 +242,20 @@ class TestSpotifyServiceCommands:
         assert "error" in result
         assert "Unknown command" in result["error"]
 
+    def test_every_command_has_handler(self):
+        """Test each dispatched command name has a _cmd_ method."""
+        for cmd in SpotifyService._COMMANDS:
+            assert callable(getattr(SpotifyService, f"_cmd_{cmd}", None)), cmd
+
+    @pytest.mark.asyncio
+    async def test_private_attribute_not_dispatched(self):
+        """Test only listed commands reach handler methods."""
+        service = SpotifyService("test")
+
+        result = await service.do_command({"command": "check_ready"})
+
+        assert "Unknown command" in result["error"]
+
     @pytest.mark.asyncio
     async def test_play_command_not_ready(self):
         """Test play command when service not ready."""
@@ -305,7 +363,7 @@ class TestSpotifyServiceCommands:
             ),
         )
         service._client = MagicMock()
-        service._client.get_status.return_value = mock_status
+        service._client.get_cached_status.return_value = mock_status
 
         result = await service.do_command({"command": "get_status"})
 
@@ -314,6 +372,25 @@ class TestSpotifyServiceCommands:
         assert result["name"] == "Test Song"
         assert result["is_playing"] is True
         assert result["volume"] == 75
+        assert "colors" not in result
+
+    @pytest.mark.asyncio
+    async def test_get_status_include_colors(self):
+        """Test get_status can return artwork colors in the same call."""
+        service = SpotifyService("test")
+        service._manager = MagicMock()
+        service._manager.is_running.return_value = True
+        service._startup_error = None
+        service._client = MagicMock()
+        service._client.get_cached_status.return_value = PlayerStatus(
+            track=TrackMetadata(artwork_url="http://example.com/img.jpg")
+        )
+
+        with patch("spotify_service.extract_colors", return_value=["#aabbcc"]):
+            result = await service.do_command({"command": "get_status", "include_colors": True})
+
+        assert result["colors"] == ["#aabbcc"]
+        service._client.get_cached_status.assert_called_once()
 
     @pytest.mark.asyncio
     async def test_get_status_no_response(self):
@@ -322,7 +399,7 @@ class TestSpotifyServiceCommands:
         service._manager = MagicMock()
         service._manager.is_running.return_value = True
         service._client = MagicMock()
-        service._client.get_status.return_value = None
+        service._client.get_cached_status.return_value = None
         service._startup_error = None
 
         result = await service.do_command({"command": "get_status"})
@@ -349,6 +426,28 @@ class TestSpotifyServiceLifecycle:
         assert service._client is None
         assert service._manager is None
 
+    @pytest.mark.asyncio
+    async def test_client_calls_use_service_executor(self):
+        """Test blocking client calls run on the service's own executor."""
+        service = SpotifyService("test")
+        config = MagicMock()
+        config.attributes.fields = {"device_name": MagicMock(string_value="Test")}
+        with patch("spotify_service.LibrespotManager") as mock_manager:
+            mock_manager.return_value.start.return_value = False
+            service.reconfigure(config, {})
+        service._client.close()
+        service._client = MagicMock()
+        service._startup_error = None
+        service._client.pause.side_effect = lambda: threading.current_thread().name
+
+        result = await service.do_command({"command": "pause"})
+
+        assert result["success"].startswith("librespot")
+        executor = service._executor
+        await service.close()
+        assert service._executor is None
+        assert executor._shutdown
+
     @pytest.mark.asyncio
     async def test_close_handles_none(self):
         """Test close handles None resources."""
@@ -358,3 +457,16 @@ class TestSpotifyServiceLifecycle:
 
         # Should not raise
         await service.close()
+
+    def test_reconfigure_keeps_color_cache(self):
+        """Test reconfiguring doesn't throw away extracted artwork colors."""
+        service = SpotifyService("test")
+        service._color_cache = OrderedDict({"http://example.com/img.jpg": ["#ff0000"]})
+        config = MagicMock()
+        config.attributes.fields = {"device_name": MagicMock(string_value="Test")}
+
+        with patch("spotify_service.LibrespotManager") as mock_manager:
+            mock_manager.return_value.start.return_value = False
+            service.reconfigure(config, {})
+
+        assert service._color_cache == {"http://example.com/img.jpg": ["#ff0000"]}